@@ -8,32 +8,40 @@ import streamlit as st
 import asyncio
 from main import main
 import os
-import shutil
-from util.constants import INPUT_DIR, OUTPUT_DIR
+from util.constants import (
+    CACHE_DIR,
+    CONVERTED_DIR_NAME,
+    JOB_POLL_INTERVAL,
+    PREVIEW_CACHE_SIZE,
+    PREVIEW_DIR_NAME,
+    PREVIEW_MODE,
+)
 from typing import Tuple
-from util.ffmpeg_processor import FFmpegProcessor, VideoSegment
-from util.video_utils import get_video_duration
+from collections import OrderedDict
+from util.ffmpeg_processor import FFmpegProcessor, VideoSegment, probe_hardware
+from util.scheduler import PRIORITY_INTERACTIVE, get_scheduler
+from util.clip_registry import ClipInfo
+from util.jobs import JOB_DONE, JOB_FAILED, Job, JobQueue
+from util.workspace import get_workspace_manager
 from datetime import datetime
 import re
+import uuid
+import json
 
 st.set_page_config(
     page_title="YouTube Highlight Extractor", page_icon="🎬", layout="wide"
 )
 
 
-def initialize_directories():
-    """입출력 디렉토리 초기화."""
-    for dir_path in [INPUT_DIR, OUTPUT_DIR]:
-        if not os.path.exists(dir_path):
-            os.makedirs(dir_path)
-
+def release_workspace(delete: bool = False):
+    """세션의 작업 공간 참조 해제.
 
-def clean_directories():
-    """이전 처리 결과 정리."""
-    for dir_path in [INPUT_DIR, OUTPUT_DIR]:
-        if os.path.exists(dir_path):
-            shutil.rmtree(dir_path)
-    initialize_directories()
+    Args:
+        delete: 즉시 삭제 여부 (False면 용량 초과 시 오래된 순서로 정리)
+    """
+    workspace = st.session_state.pop("workspace", None)
+    if workspace is not None:
+        get_workspace_manager().release(workspace, delete=delete)
 
 
 def validate_youtube_url(url: str) -> bool:
@@ -43,9 +51,13 @@ def validate_youtube_url(url: str) -> bool:
 
 def reset_session_state():
     """세션 상태 초기화"""
+    # 진행 중인 ffmpeg 작업 취소
+    get_scheduler().cancel_group(st.session_state.session_id)
+
     # 기본 상태 초기화
     st.session_state.processing_complete = False
     st.session_state.output_files = []
+    st.session_state.pop("preview_cache", None)
 
     # 변환 관련 상태 초기화
     for idx in range(1, 11):  # 최대 10개의 클립을 가정
@@ -59,19 +71,41 @@ def reset_session_state():
         os.remove(st.session_state.font_file)
         st.session_state.font_file = None
 
-    clean_directories()
+    # 백그라운드 작업은 같은 URL을 요청한 다른 세션과 공유될 수 있으므로
+    # 취소하지 않고 이 세션에서만 분리
+    st.session_state.pop("job_id", None)
+    st.session_state.pop("job_error", None)
+    st.query_params.pop("job", None)
+
+    release_workspace(delete=True)
     st.rerun()
 
 
-async def process_video(url: str):
-    """영상 처리 실행."""
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """프로세스 공용 작업 큐 (모든 세션이 공유)."""
+    return JobQueue(main)
+
+
+def submit_video(url: str, record_profile: bool = False):
+    """영상 처리 작업 등록 (처리는 백그라운드 워커에서 진행).
+
+    작업 ID를 URL 쿼리 파라미터에도 저장하므로 새로고침해도 진행 상황과
+    결과를 다시 불러온다.
+
+    Args:
+        url: YouTube URL
+        record_profile: 처리 타임라인(Chrome trace) 기록 여부
+    """
     try:
-        # 이전 결과 정리
-        clean_directories()
+        # 이전 결과 참조 해제 (작업 공간은 용량 한도 내에서 재사용 가능하도록 유지)
+        release_workspace()
+        st.session_state.pop("job_error", None)
 
         # 모든 상태 초기화
         if "clips_initialized" in st.session_state:
             del st.session_state.clips_initialized
+        st.session_state.pop("preview_cache", None)
 
         for idx in range(1, 11):
             if f"converted_video_{idx}" in st.session_state:
@@ -83,109 +117,145 @@ async def process_video(url: str):
             if f"overlay_text_{idx}" in st.session_state:
                 del st.session_state[f"overlay_text_{idx}"]
 
-        # 중앙 정렬된 스피너와 로딩 메시지
-        with st.spinner("🎬 영상 처리 중..."):
-            await main(url)
-            st.session_state.processing_complete = True
-
-        st.success("처리가 완료되었습니다!")
-
-        # 결과 영상 정보 저장
-        output_files = []
-        for root, dirs, files in os.walk(OUTPUT_DIR):
-            for file in files:
-                if file.endswith(".mp4"):
-                    file_path = os.path.join(root, file)
-                    title = os.path.splitext(file)[0]
-                    with open(file_path, "rb") as f:
-                        video_bytes = f.read()
-                    output_files.append((file_path, title, video_bytes))
-
-        st.session_state.output_files = output_files
+        job_id = get_job_queue().submit(url, record_profile=record_profile)
+        st.session_state.job_id = job_id
+        st.query_params["job"] = job_id
 
     except Exception as e:
         st.error(f"오류가 발생했습니다: {str(e)}")
 
 
-def process_video_segment_preview(
-    video_bytes: bytes, start: float, end: float
-) -> bytes:
-    """비디오 세그먼트를 추출하는 함수 (미리보기용)"""
-    # 임시 디렉토리 생성
-    os.makedirs(INPUT_DIR, exist_ok=True)
+JOB_STAGE_LABELS = {
+    "": "대기 중",
+    "metadata": "영상 정보 조회 중",
+    "select": "다운로드 및 하이라이트 구간 선택 중",
+    "clips": "클립 생성 중",
+}
+
+
+def load_job_result(job: Job):
+    """완료된 작업의 결과(클립 메타데이터/작업 공간)를 세션에 연결."""
+    workspace = get_workspace_manager().acquire(job.workspace_id)
+    if workspace is None:
+        st.session_state.job_error = "결과 파일이 정리되었습니다. 다시 추출해주세요."
+        return
+    st.session_state.workspace = workspace
+    st.session_state.output_files = job.clips
+    st.session_state.profile_path = job.profile_path
+    st.session_state.processing_complete = True
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def display_job_status():
+    """백그라운드 작업 진행 상황 표시 (주기적으로 이 부분만 다시 실행)."""
+    job = get_job_queue().get(st.session_state.job_id)
+    if job is None or job.status in (JOB_DONE, JOB_FAILED):
+        st.session_state.pop("job_id", None)
+        if job is None:
+            st.query_params.pop("job", None)
+        elif job.status == JOB_DONE:
+            load_job_result(job)
+        else:
+            st.session_state.job_error = job.error
+        # 결과 표시를 위해 전체 화면 다시 실행
+        st.rerun()
 
-    temp_input = os.path.join(INPUT_DIR, "temp_input.mp4")
-    temp_output = os.path.join(INPUT_DIR, "temp_output.mp4")
+    label = JOB_STAGE_LABELS.get(job.stage, job.stage)
+    if job.stage == "select" and job.progress < 1.0:
+        label += f" (다운로드 {job.progress * 100:.0f}%)"
+    st.progress(job.progress, text=f"🎬 영상 처리 중... {label}")
 
-    # 입력 비디오 저장
-    with open(temp_input, "wb") as f:
-        f.write(video_bytes)
 
-    try:
-        processor = FFmpegProcessor(temp_input)
-        segment = VideoSegment(start_time=int(start), end_time=int(end), index=0)
-        os.makedirs(os.path.dirname(temp_output), exist_ok=True)
+def get_preview_cache() -> OrderedDict:
+    """세션별 미리보기 캐시 ((클립 ID, 시작, 종료) -> 파일 경로, LRU 순서)."""
+    if "preview_cache" not in st.session_state:
+        st.session_state.preview_cache = OrderedDict()
+    return st.session_state.preview_cache
 
-        asyncio.run(
-            processor._process_segment(segment, title=os.path.basename(temp_output))
-        )
 
-        if not os.path.exists(temp_output):
-            temp_output = os.path.join(
-                processor.output_dir, f"{os.path.basename(temp_output)}.mp4"
-            )
+def process_video_segment_preview(clip: ClipInfo, start: float, end: float) -> str:
+    """비디오 세그먼트를 추출하는 함수 (미리보기용).
 
-        with open(temp_output, "rb") as f:
-            result = f.read()
+    (클립 ID, 시작, 종료)별로 결과를 캐시하므로 구간이 바뀐 클립만 다시
+    생성한다. 캐시가 PREVIEW_CACHE_SIZE를 넘으면 가장 오래 사용하지 않은
+    미리보기 파일부터 삭제한다.
 
-        # 임시 파일 삭제
-        if os.path.exists(temp_input):
-            os.remove(temp_input)
-        if os.path.exists(temp_output):
-            os.remove(temp_output)
+    Returns:
+        str: 미리보기 영상 경로 (실패 시 원본 클립 경로)
+    """
+    # 전체 구간이면 원본 클립을 그대로 사용
+    if start <= 0 and end >= int(clip.duration):
+        return clip.path
+
+    cache = get_preview_cache()
+    key = (clip.clip_id, int(start), int(end))
+    cached_path = cache.get(key)
+    if cached_path and os.path.exists(cached_path):
+        cache.move_to_end(key)
+        return cached_path
 
-        return result
+    try:
+        processor = FFmpegProcessor(
+            clip.path,
+            priority=PRIORITY_INTERACTIVE,
+            job_group=st.session_state.session_id,
+            # 같은 작업 공간을 보는 다른 세션과 파일이 겹치지 않도록 세션별 디렉토리
+            output_dir=os.path.join(
+                os.path.dirname(clip.path),
+                PREVIEW_DIR_NAME,
+                st.session_state.session_id,
+            ),
+        )
+        segment = VideoSegment(start_time=int(start), end_time=int(end), index=0)
+        preview_title = f"{clip.clip_id}_{int(start)}_{int(end)}"
+        asyncio.run(processor._process_segment(segment, title=preview_title))
+
+        preview_path = processor.get_output_path(0, preview_title)
+        if not os.path.exists(preview_path):
+            raise RuntimeError("미리보기 파일이 생성되지 않았습니다")
+
+        cache[key] = preview_path
+        while len(cache) > PREVIEW_CACHE_SIZE:
+            _, evicted_path = cache.popitem(last=False)
+            if os.path.exists(evicted_path):
+                os.remove(evicted_path)
+        return preview_path
     except Exception as e:
         st.error(f"비디오 세그먼트 추출 중 오류 발생: {e}")
-        if os.path.exists(temp_input):
-            os.remove(temp_input)
-        if os.path.exists(temp_output):
-            os.remove(temp_output)
-        return video_bytes
+        return clip.path
 
 
 async def process_video_segment(
-    video_bytes: bytes, start: float, end: float, overlay_text: str
-) -> bytes:
+    clip: ClipInfo, start: float, end: float, overlay_text: str
+) -> str:
     """
     비디오 세그먼트를 9:16 비율로 변환하고 텍스트를 추가하여 추출하는 함수
     영상 길이가 1분을 넘으면 1분으로 제한
-    """
-    os.makedirs(INPUT_DIR, exist_ok=True)
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+    Returns:
+        str: 변환된 영상 경로 (실패 시 원본 클립 경로)
+    """
     # 영상 길이가 1분을 넘으면 1분으로 제한
     if end - start > 60:
         end = start + 60
 
-    temp_input = os.path.join(INPUT_DIR, "temp_input.mp4")
-    temp_output = os.path.join(INPUT_DIR, "temp_output.mp4")
-    final_output = os.path.join(OUTPUT_DIR, "final_output.mp4")
-
-    with open(temp_input, "wb") as f:
-        f.write(video_bytes)
+    processor = FFmpegProcessor(
+        clip.path,
+        priority=PRIORITY_INTERACTIVE,
+        job_group=st.session_state.session_id,
+        # 같은 작업 공간을 보는 다른 세션과 파일이 겹치지 않도록 세션별 디렉토리
+        output_dir=os.path.join(
+            os.path.dirname(clip.path),
+            CONVERTED_DIR_NAME,
+            st.session_state.session_id,
+        ),
+    )
+    temp_output = processor.get_output_path(0, f"{clip.clip_id}.cut")
+    final_output = processor.get_output_path(0, clip.clip_id)
 
     try:
-        processor = FFmpegProcessor(temp_input)
         segment = VideoSegment(start_time=int(start), end_time=int(end), index=0)
-        os.makedirs(os.path.dirname(temp_output), exist_ok=True)
-
-        await processor._process_segment(segment, title=os.path.basename(temp_output))
-
-        if not os.path.exists(temp_output):
-            temp_output = os.path.join(
-                processor.output_dir, f"{os.path.basename(temp_output)}.mp4"
-            )
+        await processor._process_segment(segment, title=f"{clip.clip_id}.cut")
 
         font_path = (
             st.session_state.font_file
@@ -214,6 +284,7 @@ async def process_video_segment(
             temp_output,
             "-vf",
             f"scale=1080:607,pad=1080:1920:0:656:black,{drawtext_filter}",
+            *probe_hardware().encoder_options(),
             "-c:a",
             "copy",
             "-threads",
@@ -222,29 +293,24 @@ async def process_video_segment(
             final_output,
         ]
 
-        process = await asyncio.create_subprocess_exec(
-            *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        returncode, stdout, stderr = await get_scheduler().run(
+            command,
+            priority=PRIORITY_INTERACTIVE,
+            group=st.session_state.session_id,
         )
 
-        stdout, stderr = await process.communicate()
-
-        if process.returncode != 0:
+        if returncode != 0:
             raise Exception(f"FFmpeg 오류: {stderr.decode()}")
 
-        with open(final_output, "rb") as f:
-            result = f.read()
-
-        for file in [temp_input, temp_output, final_output]:
-            if os.path.exists(file):
-                os.remove(file)
-
-        return result
+        return final_output
     except Exception as e:
         st.error(f"디오 변환 중 오류 발생: {e}")
-        for file in [temp_input, temp_output, final_output]:
-            if os.path.exists(file):
-                os.remove(file)
-        return video_bytes
+        if os.path.exists(final_output):
+            os.remove(final_output)
+        return clip.path
+    finally:
+        if os.path.exists(temp_output):
+            os.remove(temp_output)
 
 
 def format_time(seconds: float) -> str:
@@ -257,9 +323,48 @@ def format_time(seconds: float) -> str:
     return f"{minutes:02d}:{seconds:02d}"
 
 
+def display_profile():
+    """기록된 처리 타임라인 요약 및 다운로드 버튼 표시."""
+    profile_path = st.session_state.get("profile_path")
+    if not profile_path or not os.path.exists(profile_path):
+        return
+
+    with open(profile_path, "r", encoding="utf-8") as f:
+        trace = json.load(f)
+
+    # 단계별 횟수/총 시간/최대 시간 집계
+    summary = {}
+    for event in trace["traceEvents"]:
+        if event["ph"] != "X":
+            continue
+        stats = summary.setdefault(
+            event["name"], {"횟수": 0, "총 시간(초)": 0.0, "최대(초)": 0.0}
+        )
+        stats["횟수"] += 1
+        stats["총 시간(초)"] += event["dur"] / 1e6
+        stats["최대(초)"] = max(stats["최대(초)"], event["dur"] / 1e6)
+
+    with st.expander("처리 타임라인"):
+        st.dataframe(
+            [{"단계": name, **stats} for name, stats in summary.items()],
+            use_container_width=True,
+        )
+        with open(profile_path, "rb") as f:
+            st.download_button(
+                "Chrome trace 다운로드",
+                data=f,
+                file_name="snap_trace.json",
+                mime="application/json",
+            )
+
+
 def display_results():
     """처리 결과 표시"""
     if st.session_state.output_files:
+        # 결과를 보고 있는 작업 공간은 LRU 정리 순서에서 뒤로 미룸
+        if "workspace" in st.session_state:
+            get_workspace_manager().touch(st.session_state.workspace)
+
         # 전체를 감싸는 컨테이너 생성
         container = st.container()
 
@@ -276,9 +381,8 @@ def display_results():
 
                 # 세션 상태 초기화
                 if "clips_initialized" not in st.session_state:
-                    for idx, (_, title, _) in enumerate(
-                        st.session_state.output_files, 1
-                    ):
+                    for idx, clip in enumerate(st.session_state.output_files, 1):
+                        title = clip.title
                         st.session_state[f"last_time_range_{idx}"] = (0.0, 0.0)
                         st.session_state[f"last_overlay_text_{idx}"] = title
                         st.session_state[f"converted_video_{idx}"] = None
@@ -288,17 +392,11 @@ def display_results():
                     st.session_state.clips_initialized = True
 
                 # 각 클립 처리
-                for idx, (file_path, title, video_bytes) in enumerate(
-                    st.session_state.output_files, 1
-                ):
+                for idx, clip in enumerate(st.session_state.output_files, 1):
                     with st.container():
 
-                        # 비디오 정보 추출
-                        temp_path = os.path.join(INPUT_DIR, f"temp_{idx}.mp4")
-                        with open(temp_path, "wb") as f:
-                            f.write(video_bytes)
-
-                        duration = get_video_duration(temp_path)
+                        # 미리 계산된 클립 정보 사용
+                        duration = clip.duration
 
                         col1, col2 = st.columns([3, 1])
 
@@ -348,12 +446,27 @@ def display_results():
                                 f"(총 {format_time(time_range[1] - time_range[0])})"
                             )
 
-                            preview_video = process_video_segment_preview(
-                                video_bytes, time_range[0], time_range[1]
-                            )
-                            st.video(preview_video)
+                            # 세션 상태에는 경로만 두지만, st.video도 파일을 읽어
+                            # Streamlit 미디어 저장소(메모리)에 올린 뒤 제공함
+                            if PREVIEW_MODE == "seek":
+                                # 플레이어에서 선택 구간만 재생 (ffmpeg 실행 없음)
+                                st.video(
+                                    clip.path,
+                                    start_time=int(time_range[0]),
+                                    end_time=int(time_range[1]),
+                                )
+                            else:
+                                preview_video = process_video_segment_preview(
+                                    clip, time_range[0], time_range[1]
+                                )
+                                st.video(preview_video)
 
                         with col2:
+                            if clip.thumbnail:
+                                st.image(clip.thumbnail, use_column_width=True)
+                            st.caption(
+                                f"{format_time(clip.duration)} · {clip.size / 1e6:.1f} MB"
+                            )
                             st.markdown(
                                 '<div class="convert-button-container">',
                                 unsafe_allow_html=True,
@@ -393,7 +506,7 @@ def display_results():
                                     with st.spinner("비디오 변환 중..."):
                                         converted_video = asyncio.run(
                                             process_video_segment(
-                                                video_bytes,
+                                                clip,
                                                 time_range[0],
                                                 time_range[1],
                                                 st.session_state[f"overlay_text_{idx}"],
@@ -437,16 +550,16 @@ def display_results():
                                     f"{current_time}_{safe_overlay_text}.mp4"
                                 )
 
-                                st.download_button(
-                                    label="변환된 클립 다운로드",
-                                    data=converted_video,
-                                    file_name=download_filename,
-                                    mime="video/mp4",
-                                    use_container_width=True,
-                                )
-
-                        # 임시 파일 삭제
-                        os.remove(temp_path)
+                                # 세션 상태에는 경로만 보관 (download_button은
+                                # 파일 핸들도 전부 읽어 미디어 저장소에 올림)
+                                with open(converted_video, "rb") as f:
+                                    st.download_button(
+                                        label="변환된 클립 다운로드",
+                                        data=f,
+                                        file_name=download_filename,
+                                        mime="video/mp4",
+                                        use_container_width=True,
+                                    )
 
                         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -658,12 +771,21 @@ def app_main():
     apply_custom_css()
 
     # 세션 상태 초기화
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
     if "processing_complete" not in st.session_state:
         st.session_state.processing_complete = False
     if "output_files" not in st.session_state:
         st.session_state.output_files = []
     if "font_file" not in st.session_state:
         st.session_state.font_file = None
+    if (
+        "job_id" not in st.session_state
+        and "job" in st.query_params
+        and not st.session_state.processing_complete
+    ):
+        # 새로고침 후 진행 중이던(또는 완료된) 작업 다시 연결
+        st.session_state.job_id = st.query_params["job"]
     if "openai_api_key" not in st.session_state:
         # .env 파일에서 API 키 확인
         api_key = os.getenv("OPENAI_API_KEY")
@@ -728,10 +850,12 @@ def app_main():
         )
 
         if font_file is not None:
+            font_dir = os.path.join(CACHE_DIR, "fonts")
             font_path = os.path.join(
-                INPUT_DIR, "custom_font" + os.path.splitext(font_file.name)[1]
+                font_dir,
+                st.session_state.session_id + os.path.splitext(font_file.name)[1],
             )
-            os.makedirs(INPUT_DIR, exist_ok=True)
+            os.makedirs(font_dir, exist_ok=True)
             with open(font_path, "wb") as f:
                 f.write(font_file.getbuffer())
             st.session_state.font_file = font_path
@@ -742,6 +866,11 @@ def app_main():
         # 구분선
         st.markdown('<div class="separator"></div>', unsafe_allow_html=True)
 
+        record_profile = st.checkbox(
+            "처리 타임라인 기록",
+            help="단계별 소요 시간을 Chrome trace 형식으로 저장합니다 (chrome://tracing 또는 Perfetto에서 열람)",
+        )
+
         # 버튼들
         col1, col2 = st.columns([1, 1])
         with col1:
@@ -773,10 +902,15 @@ def app_main():
 
             st.session_state.processing_complete = False
             st.session_state.output_files = []
-            asyncio.run(process_video(url))
+            submit_video(url, record_profile)
 
-    # 처리 완료 후 결과 표시
+    # 처리 중이면 진행 상황, 완료 후에는 결과 표시
+    if st.session_state.get("job_id"):
+        display_job_status()
+    elif st.session_state.get("job_error"):
+        st.error(f"오류가 발생했습니다: {st.session_state.job_error}")
     if st.session_state.processing_complete:
+        display_profile()
         display_results()
 
 
@@ -1,45 +1,102 @@
-from typing import List, Tuple
+from typing import AsyncContextManager, Callable, List, Optional, Tuple
 import asyncio
 import time
 import os
-from util.chain import set_map_chain, set_reduce_chain, set_title_chain
-from util.youtube import YouTubeVideo, download_video, time_measure_decorator
+from contextlib import AsyncExitStack, nullcontext
+from util.chain import (
+    get_llm_cache,
+    set_map_chain,
+    set_reduce_chain,
+    set_title_chain,
+)
+from util.youtube import (
+    YouTubeVideo,
+    download_video_ranges,
+    normalize_filename,
+    print_progress,
+    start_video_download,
+    time_measure_decorator,
+)
 from util.ffmpeg_processor import FFmpegProcessor
+from util.scheduler import get_scheduler
+from util.cache import get_metadata_cache
+from util.chunking import chunk_segment_keys, count_tokens
+from util.ranker import select_top_segments
+from util.profiler import profile, profiling
+from util.batch import StageLimiter, run_batch
 from util.constants import *
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 
-async def process_video_segments(segments: List[Tuple[int, int]], title: str, video: YouTubeVideo) -> None:
+async def process_video_segments(
+    segments: List[Tuple[int, int]],
+    title: str,
+    video: YouTubeVideo,
+    job_group: Optional[str] = None,
+    pieces: Optional[list] = None,
+    input_dir: str = INPUT_DIR,
+    output_dir: str = OUTPUT_DIR,
+) -> List[str]:
     """영상 세그먼트 처리.
 
     Args:
         segments: 시작/종료 시간 튜플 리스트
         title: 영상 제목
         video: YouTubeVideo 객체
+        job_group: ffmpeg 작업 그룹 (취소 단위)
+        pieces: 세그먼트별 부분 파일 또는 이를 반환하는 awaitable
+            (없으면 전체 영상 사용)
+        input_dir: 입력 영상 디렉토리
+        output_dir: 클립 출력 상위 디렉토리 (클립은 output_dir/영상 제목/ 에 저장)
+
+    Returns:
+        List[str]: 생성된 클립 경로 리스트 (생성에 실패한 세그먼트 제외)
     """
-    input_path = os.path.join(INPUT_DIR, f"{title}.mp4")
-    processor = FFmpegProcessor(input_path)
-    
-    # 각 세그먼트별 제목 생성
-    title_chain = set_title_chain()
-    segment_titles = []
-    
-    for idx, (start_t, end_t) in enumerate(segments):
+    input_path = os.path.join(input_dir, f"{title}.mp4")
+    processor = FFmpegProcessor(
+        input_path, job_group=job_group, output_dir=os.path.join(output_dir, title)
+    )
+
+    # 각 세그먼트별 제목 생성 요청 (동시 실행 수 제한)
+    title_inputs = []
+    for start_t, end_t in segments:
         # 해당 구간의 자막 추출
-        segment_text = ""
-        for trans in video.transcript:
-            if start_t <= trans["start"] <= end_t:
-                segment_text += trans["text"] + " "
-        
-        # 제목 생성
-        clip_title = title_chain.invoke({
-            "category": video.category,
-            "text": segment_text
-        })
-        segment_titles.append(clip_title)
-    
-    # 세그먼트 처리 시 생성된 제목 전달
-    await processor.process_segments(segments, segment_titles)
+        segment_text = video.text_between(start_t, end_t)
+        title_inputs.append({"category": video.category, "text": segment_text})
+
+    title_task = asyncio.create_task(generate_titles(title_inputs))
+
+    # 제목 생성과 동시에 기본 파일명으로 클립 생성
+    if pieces is not None:
+        await processor.process_pieces(segments, pieces)
+    else:
+        await processor.process_segments(segments)
+
+    # 제목 생성이 끝나면 클립 파일명 변경
+    segment_titles = await title_task
+    clip_paths = []
+    for idx, clip_title in enumerate(segment_titles):
+        clip_path = processor.get_output_path(idx)
+        if not os.path.exists(clip_path):
+            # 클립 생성에 실패한 세그먼트
+            continue
+        if isinstance(clip_title, Exception):
+            print(f"Error generating title for segment {idx}: {str(clip_title)}")
+        else:
+            # LLM 제목에 경로 구분자/개행 등이 있어도 파일명으로 쓸 수 있도록 정규화
+            clip_path = processor.rename_output(idx, normalize_filename(clip_title))
+        clip_paths.append(clip_path)
+    return clip_paths
+
+
+@profile("titles")
+async def generate_titles(title_inputs: List[dict]) -> list:
+    """세그먼트별 제목 생성 (동시 실행 수 제한, 실패한 항목은 예외 객체)."""
+    title_chain = set_title_chain()
+    return await title_chain.abatch(
+        title_inputs,
+        config={"max_concurrency": TITLE_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
 
 
 def get_target_clip_count(duration: int) -> int:
@@ -58,96 +115,414 @@ def get_target_clip_count(duration: int) -> int:
         return 5
 
 
+def validate_indices(indices: List[int], valid_keys) -> List[int]:
+    """존재하지 않는 세그먼트 번호 제거."""
+    invalid = [idx for idx in indices if idx not in valid_keys]
+    if invalid:
+        print(f"Ignoring out-of-range segment numbers: {invalid}")
+    return [idx for idx in indices if idx in valid_keys]
+
+
+async def invoke_with_retry(
+    chain_factory: Callable, inputs: dict, valid_keys
+) -> Optional[List[int]]:
+    """실패한 입력 하나만 캐시를 읽지 않고 제한된 횟수만큼 재시도.
+
+    성공한 응답은 같은 캐시 키에 저장되어 이전의 잘못된 응답을 대체하고,
+    모두 실패하면 마지막 응답을 캐시에서 삭제한다.
+
+    Args:
+        chain_factory: 체인 생성 함수 (set_map_chain, set_reduce_chain)
+        inputs: 체인 입력
+        valid_keys: 허용되는 세그먼트 번호 (유효한 번호가 없으면 실패로 처리)
+
+    Returns:
+        Optional[List[int]]: 검증된 세그먼트 번호 리스트 (모두 실패하면 None)
+    """
+    chain = chain_factory()
+    llm_cache = get_llm_cache()
+    for attempt in range(1, LLM_MAX_RETRIES + 1):
+        with llm_cache.refresh() as cache_keys:
+            try:
+                indices = validate_indices(await chain.ainvoke(inputs), valid_keys)
+                if indices:
+                    return indices
+                error = "no valid segment numbers"
+            except Exception as e:
+                error = str(e)
+        llm_cache.discard(cache_keys)
+        print(f"Retry {attempt}/{LLM_MAX_RETRIES} failed: {error}")
+    return None
+
+
+def _group_candidates(
+    candidates: List[int], shorts_group: dict, target_count: int
+) -> List[List[int]]:
+    """Reduce 입력이 컨텍스트 예산을 넘지 않도록 후보를 그룹으로 분할."""
+    groups, current, current_tokens = [], [], 0
+    for idx in candidates:
+        tokens = count_tokens(shorts_group[idx])
+        # 그룹마다 목표 개수보다 많은 후보를 담아야 단계마다 후보 수가 줄어듦
+        if (
+            current
+            and current_tokens + tokens > REDUCE_CONTEXT_TOKENS
+            and len(current) > target_count
+        ):
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(idx)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+@profile("reduce")
+async def reduce_candidates(
+    candidates: List[int], shorts_group: dict, category: str, target_count: int
+) -> List[int]:
+    """후보 세그먼트를 목표 개수로 축소 (예산 초과 시 트리 형태로 단계적 Reduce).
+
+    Args:
+        candidates: Map 단계에서 선택된 세그먼트 번호 리스트
+        shorts_group: 60초 단위 스크립트 그룹
+        category: 영상 카테고리
+        target_count: 목표 클립 개수
+
+    Returns:
+        List[int]: 최종 선택된 세그먼트 번호 리스트
+    """
+    if len(candidates) <= target_count:
+        return candidates
+
+    reduce_chain = set_reduce_chain()
+    groups = _group_candidates(candidates, shorts_group, target_count)
+    inputs = [
+        {
+            "text": "\n\n".join(shorts_group[idx] for idx in group),
+            "category": category,
+            "target_count": target_count,  # 목표 개수 전달
+        }
+        for group in groups
+    ]
+    results = await reduce_chain.abatch(inputs, return_exceptions=True)
+
+    selected = []
+    for group, group_inputs, result in zip(groups, inputs, results):
+        # 그룹에 포함된 후보만 허용 (남는 번호가 없으면 실패와 같이 처리)
+        if isinstance(result, Exception):
+            print(f"Reduce failed: {str(result)}")
+            result = []
+        indices = validate_indices(result, set(group))
+        if not indices:
+            indices = await invoke_with_retry(
+                set_reduce_chain, group_inputs, set(group)
+            )
+        if indices is None:
+            # 재시도까지 실패하면 해당 그룹의 앞쪽 후보로 대체
+            indices = group[:target_count]
+        selected.append(indices[:target_count])
+
+    if len(groups) == 1:
+        return selected[0]
+
+    # 그룹별 결과를 모아 다음 단계 Reduce 수행
+    merged = sorted({idx for result in selected for idx in result})
+    print(f"Intermediate reduce: {len(candidates)} -> {len(merged)} candidates")
+    return await reduce_candidates(merged, shorts_group, category, target_count)
+
+
+@profile("map")
+async def map_candidates(
+    shorts_group: dict,
+    category: str,
+    on_candidates: Optional[Callable[[List[int]], None]] = None,
+) -> List[int]:
+    """Map 단계: 청크별로 후보 세그먼트 번호 추출 (완료되는 순서대로 처리)."""
+    # 세그먼트 경계를 유지하며 토큰 예산 단위로 청크 처리
+    chunk_keys = chunk_segment_keys(shorts_group)
+    print(f"Chunking done...\nNumber of chunks: {len(chunk_keys)}")
+
+    map_chain = set_map_chain()
+    inputs = [
+        {
+            "text": CHUNK_SEPARATOR.join(shorts_group[key] for key in keys),
+            "category": category,
+        }
+        for keys in chunk_keys
+    ]
+    map_results_list = []
+    async for chunk_idx, result in map_chain.abatch_as_completed(
+        inputs, return_exceptions=True
+    ):
+        # 해당 청크에 포함된 세그먼트 번호만 허용
+        valid_keys = set(chunk_keys[chunk_idx])
+        if isinstance(result, Exception):
+            # 실패한 청크만 재시도
+            print(f"Map failed for chunk {chunk_idx}: {str(result)}")
+            result = await invoke_with_retry(
+                set_map_chain, inputs[chunk_idx], valid_keys
+            )
+            if result is None:
+                continue
+        indices = [
+            idx
+            for idx in validate_indices(result, valid_keys)
+            if idx not in map_results_list
+        ]
+        map_results_list.extend(indices)
+        if on_candidates and indices:
+            on_candidates(indices)
+    # 도착 순서와 무관하게 동일한 Reduce 입력(캐시 키)을 만들기 위해 정렬
+    map_results_list.sort()
+    print(f"Map results:\n{map_results_list}")
+    return map_results_list
+
+
+def segment_time_range(idx: int) -> Tuple[int, int]:
+    """세그먼트 번호에 해당하는 클립 구간 (앞뒤 CLIP_PADDING 포함)."""
+    return (
+        (idx * VIDEO_SEGMENT_LENGTH) - CLIP_PADDING,
+        ((idx + 1) * VIDEO_SEGMENT_LENGTH) + CLIP_PADDING,
+    )
+
+
 @time_measure_decorator
-async def process_map_reduce(video, category, shorts_group, shorts_all_text):
+async def process_map_reduce(
+    video,
+    category,
+    shorts_group,
+    shorts_all_text,
+    on_candidates: Optional[Callable[[List[int]], None]] = None,
+    mode: str = SELECTION_MODE,
+):
     """Map-Reduce 처리를 수행하는 비동기 함수.
 
+    Map 결과는 청크별로 도착하는 즉시 파싱되며, on_candidates 콜백으로
+    전달되어 다운로드/클립 생성 단계에서 미리 활용할 수 있다.
+
     Args:
         video: YouTubeVideo 객체
         category: 영상 카테고리
         shorts_group: 60초 단위 스크립트 그룹
         shorts_all_text: 전체 스크립트 텍스트
+        on_candidates: 청크별 Map 결과(세그먼트 번호 리스트)를 받는 콜백
+        mode: 구간 선택 방식
+            - "llm": 전체 세그먼트를 Map-Reduce
+            - "prerank": 휴리스틱 점수 상위 PRERANK_TOP_K개만 Map-Reduce
+            - "fast": LLM 없이 휴리스틱 점수만으로 선택
 
     Returns:
         List[Tuple[int, int]]: 시간 세그먼트 리스트
     """
-    # 텍스트 청크 처리
-    text_splitter = RecursiveCharacterTextSplitter()
-    chunks = text_splitter.split_text(shorts_all_text)
-    print(f"Chunking done...\nNumber of chunks: {len(chunks)}")
-
-    # Map phase
-    map_chain = set_map_chain()
-    map_results = map_chain.batch(
-        [{"text": chunk, "category": category} for chunk in chunks]
-    )
-    map_results_list = []
-    for result in map_results:
-        temp_list = list(map(int, result.split(",")))
-        temp_list = list(filter(lambda x: x != -1, temp_list))
-        map_results_list.extend(temp_list)
-    print(f"Map results:\n{map_results_list}")
-
     # 목표 클립 개수 계산
     target_count = get_target_clip_count(video.duration)
-    
-    if len(map_results_list) <= target_count:
-        reduce_results = map_results_list
+
+    if mode == "fast":
+        reduce_results = select_top_segments(video.transcript, target_count)
     else:
-        # Reduce phase에서 목표 개수만큼만 선택하도록 수정
-        concat_map_results = "\n\n".join(shorts_group[idx] for idx in map_results_list)
-        reduce_chain = set_reduce_chain()
-        reduce_results = reduce_chain.invoke({
-            "text": concat_map_results,
-            "category": category,
-            "target_count": target_count  # 목표 개수 전달
-        }).split(",")
-        reduce_results = list(map(int, reduce_results))[:target_count]  # 최대 개수 제한
-    
+        map_group = shorts_group
+        if mode == "prerank":
+            top_keys = select_top_segments(video.transcript, PRERANK_TOP_K)
+            map_group = {key: shorts_group[key] for key in top_keys}
+            print(f"Pre-ranked segments: {len(shorts_group)} -> {len(map_group)}")
+
+        # Map phase
+        map_results_list = await map_candidates(map_group, category, on_candidates)
+
+        # Reduce phase에서 목표 개수만큼만 선택
+        reduce_results = await reduce_candidates(
+            map_results_list, shorts_group, category, target_count
+        )
+
     print(f"Reduce results:\n{reduce_results}")
+    print(f"LLM cache stats: {get_llm_cache().stats()}")
 
     # 시간 세그먼트 계산
-    time_segments = [
-        (
-            (idx * VIDEO_SEGMENT_LENGTH) - CLIP_PADDING,
-            ((idx + 1) * VIDEO_SEGMENT_LENGTH) + CLIP_PADDING,
-        )
-        for idx in reduce_results
-    ]
+    time_segments = [segment_time_range(idx) for idx in reduce_results]
     print(f"Time segments:\n{time_segments}")
 
     return time_segments
 
 
-async def main(url: str) -> None:
+async def main(
+    url: str,
+    job_group: Optional[str] = None,
+    profile_path: Optional[str] = None,
+    input_dir: str = INPUT_DIR,
+    output_dir: str = OUTPUT_DIR,
+    on_stage: Optional[Callable[[str], None]] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = print_progress,
+    stage_limiter: Optional[StageLimiter] = None,
+) -> List[str]:
     """메인 실행 함수.
     
     Args:
         url: YouTube URL
+        job_group: ffmpeg 작업 그룹 (세션 초기화 시 일괄 취소용)
+        profile_path: 처리 타임라인 저장 경로 (.json: Chrome trace, .jsonl: JSON lines)
+        input_dir: 다운로드 디렉토리 (작업 공간별로 분리 가능)
+        output_dir: 클립 출력 디렉토리
+        on_stage: 처리 단계("metadata", "select", "clips")가 시작될 때 호출되는 콜백
+        progress_callback: 다운로드 (받은 바이트 수, 전체 바이트 수)를 받는 콜백
+        stage_limiter: 여러 영상을 동시에 처리할 때 단계별 동시 실행 수 제한
+
+    Returns:
+        List[str]: 이번 실행에서 생성된 클립 경로 리스트
     """
+    with profiling(profile_path) if profile_path else nullcontext():
+        return await _run(
+            url,
+            job_group,
+            input_dir,
+            output_dir,
+            on_stage or (lambda stage: None),
+            progress_callback,
+            stage_limiter.stage if stage_limiter else (lambda stage: nullcontext()),
+        )
+
+
+async def _run(
+    url: str,
+    job_group: Optional[str],
+    input_dir: str,
+    output_dir: str,
+    on_stage: Callable[[str], None],
+    progress_callback: Optional[Callable[[int, int], None]],
+    limit: Callable[[str], AsyncContextManager],
+) -> List[str]:
+    """메타데이터 조회 → 구간 선택/다운로드 → 클립 생성."""
     try:
         start_time = time.time()
 
-        # 유튜브 영상 메타데이터 추출
-        video = YouTubeVideo(url)
+        # 유튜브 영상 메타데이터 추출 (카테고리/자막/영상 정보 동시 조회)
+        on_stage("metadata")
+        async with limit("metadata"):
+            video = await YouTubeVideo.load(url)
+        print(f"Metadata cache stats: {get_metadata_cache().stats()}")
         category = video.category
         shorts_group = video.shorts_group
         shorts_all_text = video.shorts_all_text
 
-        # 다운로드와 Map-Reduce 처리를 병렬로 실행
-        download_task = download_video(url)
-        map_reduce_task = process_map_reduce(
-            video, category, shorts_group, shorts_all_text
-        )
+        async with AsyncExitStack() as cleanup:
+            pieces = None
+            on_stage("select")
+            if DOWNLOAD_MODE == "range":
+                # 구간 선택 후 필요한 부분만 다운로드
+                async with limit("select"):
+                    time_segments = await process_map_reduce(
+                        video, category, shorts_group, shorts_all_text
+                    )
+                async with limit("download"):
+                    input_title, pieces = await download_video_ranges(
+                        url, time_segments, yt=video.yt, input_dir=input_dir
+                    )
+            else:
+                # 다운로드를 시작해 두고 Map-Reduce 처리
+                # (다운로드 슬롯은 전송이 끝날 때까지만 유지하여 다른 영상의
+                # 다운로드가 이 영상의 구간 선택/클립 생성을 기다리지 않도록 함)
+                started = asyncio.get_running_loop().create_future()
 
-        # 두 작업이 모두 완료될 때까지 대기
-        input_title, time_segments = await asyncio.gather(
-            download_task, map_reduce_task
-        )
+                async def transfer() -> None:
+                    async with limit("download"):
+                        try:
+                            title, download = await start_video_download(
+                                url,
+                                yt=video.yt,
+                                progress_callback=progress_callback,
+                                input_dir=input_dir,
+                            )
+                        except asyncio.CancelledError:
+                            started.cancel()
+                            raise
+                        except Exception as e:
+                            started.set_exception(e)
+                            raise
+                        started.set_result((title, download))
+                        try:
+                            await download.wait()
+                        except asyncio.CancelledError:
+                            await download.cancel()
+                            raise
+
+                transfer_task = asyncio.ensure_future(transfer())
+                # Map 후보가 나오는 대로 해당 구간의 부분 파일을 미리 준비
+                # (Reduce에서 최종 선택되면 그대로 사용, 아니면 취소)
+                early_pieces = {}
 
-        # 클립 생성
-        await process_video_segments(time_segments, input_title, video)
+                async def stop_transfer(exc_type, exc, tb) -> None:
+                    # 구간 선택/클립 생성이 실패하면 백그라운드 다운로드도 중단
+                    if exc_type is not None:
+                        for task in early_pieces.values():
+                            task.cancel()
+                        transfer_task.cancel()
+                    await asyncio.gather(
+                        transfer_task, *early_pieces.values(), return_exceptions=True
+                    )
+
+                cleanup.push_async_exit(stop_transfer)
+                # 다운로드 슬롯을 기다리는 동안에도 구간 선택은 바로 시작하고,
+                # 그 사이에 나온 후보는 모아 두었다가 다운로드가 시작되면 준비
+                pending_indices: List[int] = []
+
+                def prepare_pieces(indices: List[int]) -> None:
+                    if not started.done():
+                        pending_indices.extend(indices)
+                        return
+                    if started.cancelled() or started.exception() is not None:
+                        return
+                    _, download = started.result()
+                    if not download.can_cut_early:
+                        return
+                    for idx in indices:
+                        time_range = segment_time_range(idx)
+                        if time_range not in early_pieces:
+                            early_pieces[time_range] = asyncio.ensure_future(
+                                download.pieces_for(*time_range)
+                            )
+
+                started.add_done_callback(lambda _: prepare_pieces(pending_indices))
+
+                async with limit("select"):
+                    time_segments = await process_map_reduce(
+                        video,
+                        category,
+                        shorts_group,
+                        shorts_all_text,
+                        on_candidates=prepare_pieces,
+                    )
+                input_title, download = await asyncio.shield(started)
+                if download.can_cut_early:
+                    # 세그먼트 구간이 도착하는 대로 클립 생성
+                    pieces = [
+                        early_pieces.pop(time_range, None)
+                        or download.pieces_for(*time_range)
+                        for time_range in time_segments
+                    ]
+                    for task in early_pieces.values():
+                        task.cancel()
+                    await asyncio.gather(*early_pieces.values(), return_exceptions=True)
+                else:
+                    await download.finish()
+
+            # 클립 생성
+            on_stage("clips")
+            async with limit("clips"):
+                clip_paths = await process_video_segments(
+                    time_segments,
+                    input_title,
+                    video,
+                    job_group,
+                    pieces=pieces,
+                    input_dir=input_dir,
+                    output_dir=output_dir,
+                )
+            if DOWNLOAD_MODE != "range" and pieces is not None:
+                # 미리보기/변환에 사용할 전체 영상 다운로드 완료 대기
+                await download.finish()
+        print(f"FFmpeg scheduler: {get_scheduler().metrics()}")
         print(f"Total execution time: {time.time() - start_time:.2f} seconds")
+        return clip_paths
 
     except Exception as e:
         print(f"Error in main process: {str(e)}")
@@ -155,10 +530,46 @@ async def main(url: str) -> None:
 
 
 if __name__ == "__main__":
-    url = "https://www.youtube.com/watch?v=4JdzuB702wI"
+    import argparse
+
+    parser = argparse.ArgumentParser(description="유튜브 영상 하이라이트 클립 추출")
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        default=["https://www.youtube.com/watch?v=4JdzuB702wI"],
+        help="영상/재생목록 URL 또는 URL 목록 파일 (여러 개면 배치 처리)",
+    )
+    parser.add_argument(
+        "--manifest", default=BATCH_MANIFEST_PATH, help="배치 처리 결과 기록 파일"
+    )
+    for stage, limit in BATCH_STAGE_LIMITS.items():
+        parser.add_argument(
+            f"--{stage}-limit",
+            type=int,
+            default=limit,
+            help=f"배치 처리 시 {stage} 단계 동시 실행 수",
+        )
+    args = parser.parse_args()
+
+    # 재생목록이나 URL 목록 파일, 여러 URL은 배치로 처리
+    batch = len(args.inputs) > 1 or any(
+        os.path.isfile(item) or ("list=" in item and "v=" not in item)
+        for item in args.inputs
+    )
+    # SNAP_PROFILE=trace.json 으로 실행하면 처리 타임라인 저장
+    profile_path = os.environ.get("SNAP_PROFILE")
     try:
         start_time = time.time()
-        asyncio.run(main(url))
+        if batch:
+            limits = {
+                stage: getattr(args, f"{stage}_limit") for stage in BATCH_STAGE_LIMITS
+            }
+            with profiling(profile_path) if profile_path else nullcontext():
+                asyncio.run(
+                    run_batch(args.inputs, main, limits, manifest_path=args.manifest)
+                )
+        else:
+            asyncio.run(main(args.inputs[0], profile_path=profile_path))
         print(f"Total execution time: {time.time() - start_time:.2f} seconds")
     except KeyboardInterrupt:
         print("Process interrupted by user")
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import os
+import re
+import time
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from pytubefix import Playlist
+
+from .constants import *
+
+
+@dataclass
+class StageStats:
+    """단계별 처리 통계.
+
+    Attributes:
+        count: 완료(성공+실패) 횟수
+        failed: 실패 횟수
+        busy: 실행 시간 합계(초)
+        waited: 슬롯 대기 시간 합계(초)
+        first_start: 처음 실행을 시작한 시각
+        last_end: 마지막으로 실행이 끝난 시각
+    """
+
+    count: int = 0
+    failed: int = 0
+    busy: float = 0.0
+    waited: float = 0.0
+    first_start: Optional[float] = None
+    last_end: Optional[float] = None
+
+
+class StageLimiter:
+    """처리 단계별 동시 실행 수 제한 및 처리량 측정.
+
+    영상마다 단계(metadata → download/select → clips)를 순서대로 거치므로
+    단계별로 제한을 두면 한 영상이 LLM을 기다리는 동안 다른 영상의
+    다운로드/클립 생성이 진행되는 파이프라인이 된다.
+    """
+
+    def __init__(self, limits: Dict[str, int] = BATCH_STAGE_LIMITS):
+        """
+        Args:
+            limits: 단계 이름 -> 최대 동시 실행 수 (없는 단계는 제한 없음)
+        """
+        self.limits = dict(limits)
+        self.stats: Dict[str, StageStats] = {}
+        self._semaphores = {
+            name: asyncio.Semaphore(limit) for name, limit in self.limits.items()
+        }
+
+    @asynccontextmanager
+    async def stage(self, name: str) -> AsyncIterator[None]:
+        """단계 슬롯을 얻어 실행하고 통계 기록."""
+        stats = self.stats.setdefault(name, StageStats())
+        queued = time.perf_counter()
+        async with self._semaphores.get(name) or nullcontext():
+            started = time.perf_counter()
+            stats.waited += started - queued
+            if stats.first_start is None:
+                stats.first_start = started
+            try:
+                yield
+            except BaseException:
+                stats.failed += 1
+                raise
+            finally:
+                ended = time.perf_counter()
+                stats.count += 1
+                stats.busy += ended - started
+                stats.last_end = ended
+
+    def report(self) -> List[dict]:
+        """단계별 처리량 (분당 처리 영상 수는 해당 단계가 실행된 구간 기준)."""
+        rows = []
+        for name, stats in self.stats.items():
+            span = (stats.last_end or 0) - (stats.first_start or 0)
+            rows.append(
+                {
+                    "stage": name,
+                    "limit": self.limits.get(name),
+                    "count": stats.count,
+                    "failed": stats.failed,
+                    "avg_s": stats.busy / stats.count if stats.count else 0.0,
+                    "avg_wait_s": stats.waited / stats.count if stats.count else 0.0,
+                    "per_min": stats.count / span * 60 if span > 0 else 0.0,
+                }
+            )
+        return rows
+
+
+def _manifest_key(url: str) -> str:
+    """URL 형식이 달라도 같은 영상이면 같은 키 (영상 ID)."""
+    if "v=" in url:
+        return url.split("v=")[1][:11]
+    if "youtu.be/" in url:
+        return url.split("youtu.be/")[1][:11]
+    return url
+
+
+class BatchManifest:
+    """영상별 처리 결과를 JSON lines로 기록 (재실행 시 완료된 영상 건너뜀)."""
+
+    def __init__(self, path: str = BATCH_MANIFEST_PATH):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        # 같은 영상은 마지막 기록 기준
+                        self.entries[_manifest_key(entry["url"])] = entry
+
+    def is_done(self, url: str) -> bool:
+        entry = self.entries.get(_manifest_key(url))
+        return entry is not None and entry["status"] == "done"
+
+    def record(self, url: str, status: str, **info) -> None:
+        """처리 결과 추가 기록."""
+        entry = {"url": url, "status": status, "finished_at": time.time(), **info}
+        self.entries[_manifest_key(url)] = entry
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def expand_urls(inputs: List[str]) -> List[str]:
+    """입력(URL, URL 목록 파일, 재생목록)을 영상 URL 리스트로 변환 (중복 제거).
+
+    Args:
+        inputs: 영상/재생목록 URL 또는 한 줄에 URL 하나씩 적힌 파일 경로
+            (빈 줄과 #으로 시작하는 줄은 무시)
+
+    Returns:
+        List[str]: 입력 순서를 유지한 영상 URL 리스트
+    """
+    urls = []
+    for item in inputs:
+        if os.path.isfile(item):
+            with open(item, "r", encoding="utf-8") as f:
+                lines = [line.strip() for line in f]
+            urls.extend(expand_urls([l for l in lines if l and not l.startswith("#")]))
+        elif "list=" in item and "v=" not in item:
+            urls.extend(Playlist(item).video_urls)
+        else:
+            urls.append(item)
+
+    seen = set()
+    unique = []
+    for url in urls:
+        key = _manifest_key(url)
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return unique
+
+
+async def run_batch(
+    inputs: List[str],
+    pipeline: Callable[..., Awaitable[List[str]]],
+    limits: Dict[str, int] = BATCH_STAGE_LIMITS,
+    manifest_path: str = BATCH_MANIFEST_PATH,
+    input_dir: str = INPUT_DIR,
+    output_dir: str = OUTPUT_DIR,
+) -> List[dict]:
+    """여러 영상을 한 이벤트 루프에서 단계별 파이프라인으로 처리.
+
+    LLM 클라이언트/HTTP 세션/ffmpeg 스케줄러는 같은 이벤트 루프와
+    프로세스에서 공유된다. 매니페스트에 완료로 기록된 영상은 건너뛴다.
+
+    Args:
+        inputs: 영상/재생목록 URL 또는 URL 목록 파일 경로
+        pipeline: 영상 하나를 처리하는 함수 (main.main, 생성된 클립 경로 리스트 반환)
+        limits: 단계별 최대 동시 실행 수
+        manifest_path: 처리 결과 기록 파일
+        input_dir: 다운로드 상위 디렉토리 (영상마다 영상 ID 하위 디렉토리 사용)
+        output_dir: 클립 출력 상위 디렉토리 (영상마다 영상 ID 하위 디렉토리 사용)
+
+    Returns:
+        List[dict]: 단계별 처리량 (StageLimiter.report)
+    """
+    urls = await asyncio.to_thread(expand_urls, inputs)
+    manifest = BatchManifest(manifest_path)
+    pending = [url for url in urls if not manifest.is_done(url)]
+    print(f"Batch: {len(urls)} videos, {len(urls) - len(pending)} already done")
+
+    limiter = StageLimiter(limits)
+    counts = {"done": 0, "failed": 0}
+
+    async def process(url: str) -> None:
+        started = time.perf_counter()
+        # 제목이 같은 영상끼리 파일이 섞이지 않도록 영상마다 디렉토리 분리
+        video_dir = re.sub(r"[^\w-]", "_", _manifest_key(url))
+        try:
+            clip_paths = await pipeline(
+                url,
+                output_dir=os.path.join(output_dir, video_dir),
+                input_dir=os.path.join(input_dir, video_dir),
+                progress_callback=None,  # 여러 영상의 진행률 출력이 섞이지 않도록
+                stage_limiter=limiter,
+            )
+            if not clip_paths:
+                # 클립 생성이 모두 실패해도 파이프라인은 예외 없이 끝날 수 있음
+                # (이전 실행에서 남은 클립은 세지 않음)
+                raise RuntimeError("No clips were produced")
+            manifest.record(
+                url,
+                "done",
+                output=os.path.dirname(clip_paths[0]),
+                clips=len(clip_paths),
+                elapsed=time.perf_counter() - started,
+            )
+            counts["done"] += 1
+        except Exception as e:
+            manifest.record(
+                url, "failed", error=str(e), elapsed=time.perf_counter() - started
+            )
+            counts["failed"] += 1
+        print(
+            f"Batch progress: {counts['done'] + counts['failed']}/{len(pending)}"
+            f" (failed {counts['failed']})"
+        )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(process(url) for url in pending))
+    elapsed = time.perf_counter() - started
+
+    report = limiter.report()
+    print(
+        f"Batch finished in {elapsed:.1f}s: {counts['done']} done,"
+        f" {counts['failed']} failed"
+        f" ({counts['done'] / elapsed * 60 if elapsed > 0 else 0:.2f} videos/min)"
+    )
+    for row in report:
+        print(
+            f"  {row['stage']:<9} limit={row['limit']} count={row['count']}"
+            f" failed={row['failed']} avg={row['avg_s']:.1f}s"
+            f" wait={row['avg_wait_s']:.1f}s {row['per_min']:.2f}/min"
+        )
+    return report
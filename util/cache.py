@@ -0,0 +1,176 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from .constants import *
+
+
+class SQLiteCache:
+    """SQLite 기반 영구 키-값 캐시.
+
+    값은 JSON으로 직렬화 후 zlib 압축하여 저장한다. 만료 시간(TTL)이
+    지난 항목은 조회 시 제거되며, 네임스페이스별 전체 크기가 max_bytes를
+    넘으면 가장 오래 사용되지 않은 항목부터 제거한다(LRU).
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        path: str = CACHE_DB_PATH,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        """
+        Args:
+            namespace: 캐시 네임스페이스 (같은 DB 파일을 여러 용도로 공유)
+            path: SQLite DB 파일 경로
+            ttl: 항목 유효 시간(초, None이면 만료 없음)
+            max_bytes: 네임스페이스 최대 크기(바이트, None이면 제한 없음)
+        """
+        self.namespace = namespace
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache (namespace, accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """캐시 조회 (없거나 만료되었으면 None)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+                self._conn.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def set(self, key: str, value: Any) -> None:
+        """캐시 저장 후 필요 시 LRU 제거."""
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, blob, len(blob), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """네임스페이스의 모든 항목 삭제 (같은 DB의 다른 네임스페이스는 유지)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """만료 항목과 크기 초과분 제거 (lock 보유 상태에서 호출)."""
+        if self.ttl is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND created_at < ?",
+                (self.namespace, now - self.ttl),
+            )
+            self.evictions += cursor.rowcount
+
+        if self.max_bytes is None:
+            return
+
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM cache WHERE namespace = ? ORDER BY accessed_at",
+            (self.namespace,),
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """캐시 적중/미스/제거 횟수 반환."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+_caches: Dict[str, SQLiteCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(
+    namespace: str, ttl: Optional[float] = None, max_bytes: Optional[int] = None
+) -> SQLiteCache:
+    """네임스페이스별 공용 캐시 인스턴스 반환."""
+    with _caches_lock:
+        if namespace not in _caches:
+            _caches[namespace] = SQLiteCache(namespace, ttl=ttl, max_bytes=max_bytes)
+        return _caches[namespace]
+
+
+def get_metadata_cache() -> SQLiteCache:
+    """video_id → 영상 메타데이터(자막/카테고리/길이/제목) 캐시 반환."""
+    return get_cache(
+        "video_metadata", ttl=METADATA_CACHE_TTL, max_bytes=METADATA_CACHE_MAX_BYTES
+    )
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import os
+import re
+from typing import Awaitable, Optional
+
+import requests
+
+from .cache import SQLiteCache, get_cache
+from .constants import *
+from .http import get_http_session
+from .profiler import profile
+
+
+_CATEGORY_PATTERN = re.compile(r'"category":"((?:[^"\\]|\\.)*)"')
+_GENRE_META_PATTERN = re.compile(r'<meta\s+itemprop="genre"\s+content="([^"]*)"')
+
+
+def parse_category(html: str) -> Optional[str]:
+    """watch 페이지 HTML에서 카테고리 추출.
+
+    Args:
+        html: 유튜브 watch 페이지 HTML
+
+    Returns:
+        Optional[str]: 카테고리 (찾지 못하면 None)
+    """
+    match = _CATEGORY_PATTERN.search(html)
+    if match:
+        # JSON 문자열 이스케이프(& 등) 해제
+        return json.loads(f'"{match.group(1)}"')
+
+    match = _GENRE_META_PATTERN.search(html)
+    if match:
+        return match.group(1).replace("&amp;", "&")
+    return None
+
+
+def category_from_vid_info(vid_info: Optional[dict]) -> Optional[str]:
+    """pytubefix가 이미 받아 둔 플레이어 응답(vid_info)에서 카테고리 추출.
+
+    Args:
+        vid_info: YouTube.vid_info (innertube player 응답)
+
+    Returns:
+        Optional[str]: 카테고리 (클라이언트 종류에 따라 microformat이 없으면 None)
+    """
+    microformat = (vid_info or {}).get("microformat", {})
+    return microformat.get("playerMicroformatRenderer", {}).get("category") or None
+
+
+class CategoryResolver:
+    """유튜브 영상 카테고리 조회 클래스.
+
+    pytubefix가 받아 둔 플레이어 응답을 먼저 확인하고, 없으면 watch 페이지를
+    일반 HTTP 요청으로 받아 카테고리를 파싱한다. 결과는 video_id 기준으로
+    영구 캐시된다. Selenium은 명시적으로 활성화한 경우에만 대체 경로로
+    사용한다. 카테고리는 프롬프트 보조 정보이므로 모두 실패하면
+    DEFAULT_CATEGORY로 대체한다.
+    """
+
+    def __init__(
+        self,
+        watch_url: str = YOUTUBE_WATCH_URL,
+        cache: Optional[SQLiteCache] = None,
+        use_selenium_fallback: bool = CATEGORY_SELENIUM_FALLBACK,
+        timeout: float = HTTP_TIMEOUT,
+    ):
+        """
+        Args:
+            watch_url: watch 페이지 기본 URL (테스트 시 로컬 스텁 서버 주소)
+            cache: 카테고리 캐시 (None이면 기본 경로의 캐시 사용)
+            use_selenium_fallback: HTTP 조회 실패 시 Selenium 사용 여부
+            timeout: HTTP 요청 타임아웃(초)
+        """
+        self.watch_url = watch_url
+        self.cache = cache if cache is not None else get_cache("category")
+        self.use_selenium_fallback = use_selenium_fallback
+        self.timeout = timeout
+
+    @profile("metadata.category")
+    def resolve(self, video_id: str, vid_info: Optional[dict] = None) -> str:
+        """카테고리 반환 (캐시 → vid_info → HTTP → Selenium → 기본값 순서).
+
+        Args:
+            video_id: 유튜브 영상 ID
+            vid_info: pytubefix가 받아 둔 플레이어 응답 (있으면 추가 요청 없음)
+
+        Returns:
+            str: 유튜브 영상 카테고리 (조회 실패 시 DEFAULT_CATEGORY)
+        """
+        category = self.cache.get(video_id)
+        if category:
+            return category
+
+        category = category_from_vid_info(vid_info)
+        if not category:
+            category = self._fetch_http(video_id)
+        if not category and self.use_selenium_fallback:
+            category = self._fetch_selenium(video_id)
+        if not category:
+            # 다음 실행에서 다시 조회하도록 기본값은 캐시하지 않음
+            print(f"Category not found for {video_id}, using {DEFAULT_CATEGORY}")
+            return DEFAULT_CATEGORY
+
+        self.cache.set(video_id, category)
+        return category
+
+    async def resolve_async(
+        self, video_id: str, vid_info: Awaitable[Optional[dict]]
+    ) -> str:
+        """vid_info 조회와 동시에 캐시/HTTP 조회를 시작하여 카테고리 반환.
+
+        vid_info에 카테고리가 있으면 HTTP 조회 결과를 기다리지 않는다
+        (요청 중인 스레드는 끝까지 실행되지만 결과는 버림).
+
+        Args:
+            video_id: 유튜브 영상 ID
+            vid_info: pytubefix 플레이어 응답을 돌려주는 awaitable
+
+        Returns:
+            str: 유튜브 영상 카테고리 (조회 실패 시 DEFAULT_CATEGORY)
+        """
+        fetch = asyncio.ensure_future(asyncio.to_thread(self.resolve, video_id))
+        try:
+            category = category_from_vid_info(await vid_info)
+        except BaseException:
+            fetch.cancel()
+            raise
+        if not category:
+            return await fetch
+        if not fetch.done():
+            fetch.cancel()
+        self.cache.set(video_id, category)
+        return category
+
+    def _fetch_http(self, video_id: str) -> Optional[str]:
+        """HTTP로 watch 페이지를 받아 카테고리 파싱."""
+        try:
+            response = get_http_session().get(
+                self.watch_url, params={"v": video_id}, timeout=self.timeout
+            )
+            response.raise_for_status()
+            return parse_category(response.text)
+        except requests.RequestException as e:
+            print(f"Error fetching watch page for {video_id}: {str(e)}")
+            return None
+
+    def _fetch_selenium(self, video_id: str) -> Optional[str]:
+        """헤드리스 Chrome으로 카테고리 파싱 (대체 경로)."""
+        # Selenium은 대체 경로에서만 필요하므로 지연 import
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+
+        # ChromeDriver를 자동으로 설치하고 관리
+        service = Service(ChromeDriverManager().install())
+        driver = webdriver.Chrome(service=service, options=options)
+
+        try:
+            driver.get(f"{self.watch_url}?v={video_id}")
+            return parse_category(driver.page_source)
+        finally:
+            driver.quit()
+
+
+if __name__ == "__main__":
+    # 로컬 HTTP 스텁 서버로 카테고리 조회 검증
+    #   python -m util.category                  (내장 샘플)
+    #   python -m util.category saved_watch.html (저장한 watch 페이지, 기대값 없이 출력만)
+    import http.server
+    import sys
+    import tempfile
+    import threading
+    import time
+
+    # 이름 -> (watch 페이지 HTML, 기대 카테고리)
+    samples = {
+        "json": (
+            '<script>var ytInitialPlayerResponse = {"category":"Film \\u0026 Animation"};'
+            "</script>",
+            "Film & Animation",
+        ),
+        "meta": (
+            '<meta itemprop="genre" content="Science &amp; Technology">',
+            "Science & Technology",
+        ),
+        "missing": ("<html><body>consent</body></html>", DEFAULT_CATEGORY),
+    }
+    slow_page = '<script>var ytInitialPlayerResponse = {"category":"Music"};</script>'
+
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8") as f:
+            samples[os.path.basename(path)] = (f.read(), None)
+
+    class WatchPageHandler(http.server.BaseHTTPRequestHandler):
+        """?v=<샘플 이름> 요청에 저장된 HTML을 돌려주는 핸들러."""
+
+        def do_GET(self):
+            name = self.path.split("v=", 1)[-1]
+            if name.startswith("slow"):
+                # 느린 watch 페이지 (vid_info가 먼저 오면 기다리지 않아야 함)
+                time.sleep(1.0)
+                body = slow_page.encode("utf-8")
+            else:
+                body = samples[name][0].encode("utf-8") if name in samples else b""
+            self.send_response(200 if body else 404)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), WatchPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cache = SQLiteCache(
+        "category", path=os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+    )
+    resolver = CategoryResolver(
+        watch_url=f"http://127.0.0.1:{server.server_port}/watch", cache=cache
+    )
+
+    for name, (_, expected) in samples.items():
+        category = resolver.resolve(name)
+        status = "" if expected is None else ("ok" if category == expected else "FAIL")
+        print(f"{name:>16}: {category} {status}")
+        assert expected is None or category == expected
+
+    # vid_info에 카테고리가 있으면 HTTP 요청 없이 사용
+    vid_info = {"microformat": {"playerMicroformatRenderer": {"category": "Gaming"}}}
+    assert resolver.resolve("not-served", vid_info) == "Gaming"
+    # 기본값은 캐시하지 않고, 조회된 값만 캐시
+    assert cache.get("missing") is None and cache.get("json") == "Film & Animation"
+    print("vid_info/cache: ok")
+
+    async def player_response(category: Optional[str], delay: float) -> dict:
+        await asyncio.sleep(delay)
+        return {"microformat": {"playerMicroformatRenderer": {"category": category}}}
+
+    async def timed(video_id: str, vid_info) -> tuple:
+        # asyncio.run 종료 시 스레드 대기 시간은 제외
+        started = time.perf_counter()
+        category = await resolver.resolve_async(video_id, vid_info)
+        return category, time.perf_counter() - started
+
+    # HTTP 조회는 vid_info와 동시에 시작, vid_info에 카테고리가 있으면 바로 반환
+    category, elapsed = asyncio.run(timed("slow", player_response("Gaming", 0.2)))
+    print(f"vid_info first: {category} in {elapsed:.2f} s")
+    assert category == "Gaming" and elapsed < 0.9
+    # vid_info에 카테고리가 없으면 함께 시작한 HTTP 조회 결과 사용 (1.0 + 0.5초가 아님)
+    category, elapsed = asyncio.run(timed("slow2", player_response(None, 0.5)))
+    print(f"HTTP overlapped: {category} in {elapsed:.2f} s")
+    assert category == "Music" and elapsed < 1.4
+    server.shutdown()
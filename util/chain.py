@@ -1,11 +1,196 @@
+import asyncio
+import hashlib
+import re
+import threading
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
 from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.exceptions import OutputParserException
+from langchain_core.outputs import Generation
+from langchain_core.output_parsers import BaseOutputParser, StrOutputParser
 from langchain_core.prompts import PromptTemplate
-from util.constants import DEFAULT_MODEL
+from util.cache import SQLiteCache, get_cache
+from util.constants import (
+    DEFAULT_MODEL,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_TTL,
+    TITLE_CHAIN_CACHE,
+)
+
+
+# 재시도 중인 컨텍스트에서 새로 기록된 캐시 키 (None이면 일반 모드)
+_refresh_keys: ContextVar[Optional[List[str]]] = ContextVar(
+    "llm_cache_refresh", default=None
+)
+
+
+class LLMResponseCache(BaseCache):
+    """프롬프트 해시 → LLM 응답 영구 캐시.
+
+    키는 모델 설정(llm_string: 모델명, temperature 등)과 템플릿에 입력값이
+    채워진 최종 프롬프트의 해시이므로, 같은 영상을 다시 처리하면 LLM 호출
+    없이 이전 응답을 재사용한다.
+    """
+
+    def __init__(self, store: Optional[SQLiteCache] = None):
+        """
+        Args:
+            store: 응답을 저장할 캐시 (None이면 기본 llm 네임스페이스 사용)
+        """
+        self.store = (
+            store
+            if store is not None
+            else get_cache("llm", ttl=LLM_CACHE_TTL, max_bytes=LLM_CACHE_MAX_BYTES)
+        )
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if _refresh_keys.get() is not None:
+            return None
+        cached = self.store.get(self._key(prompt, llm_string))
+        if cached is None:
+            return None
+        return [loads(generation) for generation in cached]
+
+    def update(
+        self, prompt: str, llm_string: str, return_val: Sequence[Generation]
+    ) -> None:
+        key = self._key(prompt, llm_string)
+        self.store.set(key, [dumps(generation) for generation in return_val])
+        refresh_keys = _refresh_keys.get()
+        if refresh_keys is not None:
+            refresh_keys.append(key)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """캐시 적중/미스/제거 횟수 반환."""
+        return self.store.stats()
+
+    @contextmanager
+    def refresh(self) -> Iterator[List[str]]:
+        """캐시를 읽지 않고 새 응답으로 덮어쓰는 구간.
+
+        파싱에 실패한 응답도 캐시에 저장되므로, 재시도는 같은 체인(같은 캐시
+        키)으로 이 구간 안에서 실행하여 성공한 응답이 잘못된 응답을 대체하게
+        한다.
+
+        Yields:
+            List[str]: 구간 안에서 기록된 캐시 키 (재시도가 실패하면 discard로 삭제)
+        """
+        keys: List[str] = []
+        token = _refresh_keys.set(keys)
+        try:
+            yield keys
+        finally:
+            _refresh_keys.reset(token)
+
+    def discard(self, keys: List[str]) -> None:
+        """파싱할 수 없는 응답이 다음 실행에서 재사용되지 않도록 삭제."""
+        for key in keys:
+            self.store.delete(key)
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """프로세스 공용 LLM 응답 캐시 반환."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache()
+        return _llm_cache
+
+
+# 응답 첫 줄 전체가 번호 목록이어야 함 ("1,3", "[1, 3]", "[1],[3]")
+_INDEX_LIST_PATTERN = re.compile(r"^\[?\s*\[?\d+\]?(?:\s*,\s*\[?\d+\]?)*\s*\]?$")
 
 
-def set_map_chain():
-    llm = ChatOpenAI(model=DEFAULT_MODEL, temperature=0)
+class SegmentIndexParser(BaseOutputParser[List[int]]):
+    """LLM 응답에서 세그먼트 번호 리스트 추출.
+
+    응답의 첫 줄이 "1,3"이나 "[1, 3]"처럼 번호 목록 전체여야 하며, 중복은
+    제거하고 "-1"(선택 없음)은 빈 리스트로 반환한다. "1-3"이나 설명 문장처럼
+    다른 숫자가 섞일 수 있는 형식은 OutputParserException을 발생시켜
+    재시도하도록 한다.
+    """
+
+    def parse(self, text: str) -> List[int]:
+        lines = [line.strip().strip("`'\"") for line in text.strip().splitlines()]
+        first_line = next((line for line in lines if line), "")
+        if first_line == "-1":
+            return []
+        if not _INDEX_LIST_PATTERN.match(first_line):
+            raise OutputParserException(
+                f"Output is not a segment number list: {text!r}", llm_output=text
+            )
+        indices = []
+        for number in map(int, re.findall(r"\d+", first_line)):
+            if number not in indices:
+                indices.append(number)
+        return indices
+
+    @property
+    def _type(self) -> str:
+        return "segment_index"
+
+
+_llms: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+_llms_lock = threading.Lock()
+
+
+def _get_llm(temperature: float, use_cache: bool) -> ChatOpenAI:
+    """LLM 클라이언트 반환 (같은 이벤트 루프에서는 재사용하여 커넥션 풀 공유).
+
+    비동기 HTTP 커넥션은 생성된 이벤트 루프에서만 사용할 수 있으므로
+    이벤트 루프별로 따로 보관한다.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    def create() -> ChatOpenAI:
+        return ChatOpenAI(
+            model=DEFAULT_MODEL,
+            temperature=temperature,
+            cache=get_llm_cache() if use_cache else False,
+        )
+
+    if loop is None:
+        return create()
+    with _llms_lock:
+        llms = _llms.setdefault(loop, {})
+        key = (temperature, use_cache)
+        if key not in llms:
+            llms[key] = create()
+        return llms[key]
+
+
+def _set_llm(use_cache: bool) -> ChatOpenAI:
+    return _get_llm(0, use_cache)
+
+
+def set_map_chain(use_cache: bool = True):
+    """Map 단계 체인 설정 (출력: 세그먼트 번호 리스트)
+
+    Args:
+        use_cache: 응답 캐시 사용 여부
+    """
+    llm = _set_llm(use_cache)
     map_template = """
     You are a helpful assistant that aids in extracting potential hot clip segments from YouTube video scripts based on the characteristics of {category} content.
     When analyzing the transcript, please consider the following format:
@@ -37,13 +222,18 @@ def set_map_chain():
     """
     map_prompt = PromptTemplate.from_template(map_template)
 
-    map_chain = map_prompt | llm | StrOutputParser()
+    map_chain = map_prompt | llm | SegmentIndexParser()
 
     return map_chain
 
 
-def set_reduce_chain():
-    llm = ChatOpenAI(model=DEFAULT_MODEL, temperature=0)
+def set_reduce_chain(use_cache: bool = True):
+    """Reduce 단계 체인 설정 (출력: 세그먼트 번호 리스트)
+
+    Args:
+        use_cache: 응답 캐시 사용 여부
+    """
+    llm = _set_llm(use_cache)
     reduce_template = """
     You are a helpful assistant that aids in extracting potential hot clip segments from YouTube video scripts based on the characteristics of {category} content.
     INPUT text is a concatenation of the selected segments from the previous MAP step.
@@ -69,14 +259,18 @@ def set_reduce_chain():
     OUTPUT
     """
     reduce_prompt = PromptTemplate.from_template(reduce_template)
-    reduce_chain = reduce_prompt | llm | StrOutputParser()
+    reduce_chain = reduce_prompt | llm | SegmentIndexParser()
 
     return reduce_chain
 
 
-def set_title_chain():
-    """클립 제목 생성을 위한 체인 설정"""
-    llm = ChatOpenAI(model=DEFAULT_MODEL, temperature=0.7)  # 약간의 창의성을 위해 temperature 조정
+def set_title_chain(use_cache: bool = TITLE_CHAIN_CACHE):
+    """클립 제목 생성을 위한 체인 설정
+
+    Args:
+        use_cache: 응답 캐시 사용 여부 (기본값은 매번 새 제목 생성)
+    """
+    llm = _get_llm(0.7, use_cache)  # 약간의 창의성을 위해 temperature 조정
     
     title_template = """
     You are a helpful assistant that creates engaging YouTube clip titles.
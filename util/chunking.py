@@ -0,0 +1,93 @@
+from functools import lru_cache
+from typing import Dict, List
+
+import tiktoken
+
+from .constants import *
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """모델 토크나이저 기준 토큰 수 반환."""
+    return len(_get_encoding(model).encode(text))
+
+
+def chunk_segment_keys(
+    shorts_group: Dict[int, str],
+    max_tokens: int = MAP_CHUNK_TOKENS,
+    model: str = DEFAULT_MODEL,
+) -> List[List[int]]:
+    """세그먼트 단위로 Map 입력 청크 분할.
+
+    "[N] ..." 세그먼트를 순서대로 토큰 예산 안에서 최대한 채워 넣으며,
+    하나의 세그먼트가 여러 청크로 나뉘지 않는다. 예산보다 큰 세그먼트는
+    단독 청크가 된다.
+
+    Args:
+        shorts_group: 60초 단위 스크립트 그룹
+        max_tokens: 청크당 최대 토큰 수
+        model: 토큰 수 계산에 사용할 모델명
+
+    Returns:
+        List[List[int]]: 청크별 세그먼트 번호 리스트
+    """
+    separator_tokens = count_tokens(CHUNK_SEPARATOR, model)
+
+    chunks, current, current_tokens = [], [], 0
+    for key in sorted(shorts_group):
+        tokens = count_tokens(shorts_group[key], model)
+        added_tokens = tokens + (separator_tokens if current else 0)
+        if current and current_tokens + added_tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+            added_tokens = tokens
+        current.append(key)
+        current_tokens += added_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_shorts_group(
+    shorts_group: Dict[int, str],
+    max_tokens: int = MAP_CHUNK_TOKENS,
+    model: str = DEFAULT_MODEL,
+) -> List[str]:
+    """세그먼트 단위로 Map 입력 청크 생성 (chunk_segment_keys 기준).
+
+    Returns:
+        List[str]: 청크 텍스트 리스트
+    """
+    return [
+        CHUNK_SEPARATOR.join(shorts_group[key] for key in keys)
+        for keys in chunk_segment_keys(shorts_group, max_tokens, model)
+    ]
+
+
+if __name__ == "__main__":
+    # 영상 길이별 청크 개수/토큰 수 벤치마크 (합성 자막 사용)
+    import time
+
+    sample_line = "오늘은 정말 재미있는 이야기를 해볼게요 여러분 이거 진짜 대박이에요"
+
+    print(f"{'minutes':>8} {'chunks':>7} {'total_tokens':>13} {'max_chunk':>10} {'ms':>8}")
+    for minutes in [10, 30, 60, 180, 600]:
+        # 60초 세그먼트당 약 15줄의 자막
+        shorts_group = {
+            key: f"[{key}] " + " ".join([sample_line] * 15) for key in range(minutes)
+        }
+        start_time = time.perf_counter()
+        chunks = chunk_shorts_group(shorts_group)
+        elapsed = (time.perf_counter() - start_time) * 1000
+        chunk_tokens = [count_tokens(chunk) for chunk in chunks]
+        print(
+            f"{minutes:>8} {len(chunks):>7} {sum(chunk_tokens):>13} "
+            f"{max(chunk_tokens):>10} {elapsed:>8.1f}"
+        )
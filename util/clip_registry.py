@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .constants import *
+from .scheduler import PRIORITY_INTERACTIVE, get_scheduler
+from .video_utils import get_video_duration
+
+
+@dataclass(frozen=True)
+class ClipInfo:
+    """생성된 클립의 메타데이터 (영상 데이터는 파일로만 보관).
+
+    Attributes:
+        clip_id: 경로/수정 시각 기반 클립 ID
+        path: 클립 파일 경로
+        title: 클립 제목 (파일명)
+        duration: 길이(초)
+        size: 파일 크기(바이트)
+        thumbnail: 썸네일 이미지 경로 (생성 실패 시 None)
+    """
+
+    clip_id: str
+    path: str
+    title: str
+    duration: float
+    size: int
+    thumbnail: Optional[str] = None
+
+
+def _clip_id(path: str, mtime: float) -> str:
+    key = f"{os.path.abspath(path)}:{mtime}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+async def _make_thumbnail(
+    path: str, duration: float, job_group: Optional[str]
+) -> Optional[str]:
+    """클립 중간 지점 프레임으로 썸네일 생성."""
+    thumbnail_path = f"{os.path.splitext(path)[0]}{CLIP_THUMBNAIL_SUFFIX}"
+    if (
+        os.path.exists(thumbnail_path)
+        and os.path.getmtime(thumbnail_path) >= os.path.getmtime(path)
+    ):
+        return thumbnail_path
+    returncode, _, _ = await get_scheduler().run(
+        [
+            "ffmpeg",
+            "-y",
+            "-ss",
+            f"{duration / 2:.3f}",
+            "-i",
+            path,
+            "-frames:v",
+            "1",
+            "-vf",
+            f"scale={CLIP_THUMBNAIL_WIDTH}:-2",
+            thumbnail_path,
+        ],
+        priority=PRIORITY_INTERACTIVE,
+        group=job_group,
+    )
+    return thumbnail_path if returncode == 0 else None
+
+
+async def build_clip_info(path: str, job_group: Optional[str] = None) -> ClipInfo:
+    """클립 파일의 메타데이터를 한 번만 계산.
+
+    Args:
+        path: 클립 파일 경로
+        job_group: 썸네일 생성 ffmpeg 작업 그룹
+
+    Returns:
+        ClipInfo: 클립 메타데이터
+    """
+    stat = os.stat(path)
+    duration = await asyncio.to_thread(get_video_duration, path)
+    return ClipInfo(
+        clip_id=_clip_id(path, stat.st_mtime),
+        path=path,
+        title=os.path.splitext(os.path.basename(path))[0],
+        duration=duration,
+        size=stat.st_size,
+        thumbnail=await _make_thumbnail(path, duration, job_group),
+    )
+
+
+async def scan_clips(
+    output_dir: str = OUTPUT_DIR, job_group: Optional[str] = None
+) -> List[ClipInfo]:
+    """출력 디렉토리의 완성된 클립 목록 생성 (작업 중인 임시 파일 제외).
+
+    Args:
+        output_dir: 클립이 저장된 디렉토리
+        job_group: 썸네일 생성 ffmpeg 작업 그룹
+
+    Returns:
+        List[ClipInfo]: 경로 순으로 정렬된 클립 메타데이터
+    """
+    paths = []
+    for root, dirs, files in os.walk(output_dir):
+        # 변환/미리보기 결과는 클립 목록에서 제외
+        dirs[:] = [d for d in dirs if d not in (CONVERTED_DIR_NAME, PREVIEW_DIR_NAME)]
+        for file in files:
+            if file.endswith(".mp4") and not file.endswith(".temp.mp4"):
+                paths.append(os.path.join(root, file))
+    return list(
+        await asyncio.gather(*(build_clip_info(path, job_group) for path in sorted(paths)))
+    )
@@ -3,13 +3,101 @@ VIDEO_SEGMENT_LENGTH = 60  # 세그먼트 길이(초)
 CLIP_PADDING = 10  # 시작/종료 패딩(초)
 MIN_CLIP_LENGTH = 10  # 최소 클립 길이(초)
 
+CUT_MODE = "segment"  # 클립 자르기 방식 ("segment" | "batch" | "smart")
+BATCH_CUT_MAX_GAP = 10  # batch 자르기에서 한 번에 읽을 세그먼트 사이 최대 간격(초)
+SMART_CUT_EPSILON = 0.01  # 스마트 자르기에서 무시할 head/tail 길이(초)
+# 스마트 자르기 재인코딩 시 원본과 맞출 H.264 프로파일 (ffprobe 이름 -> libx264 이름)
+SMART_CUT_X264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+    "High 10": "high10",
+    "High 4:2:2": "high422",
+    "High 4:4:4 Predictive": "high444",
+}
+FFMPEG_MAX_WORKERS = None  # ffmpeg 최대 동시 실행 수 (None이면 CPU 코어 수)
+FFMPEG_PROBE_TIMEOUT = 10  # 하드웨어 지원 확인 타임아웃(초)
+MEDIA_INDEX_SUFFIX = ".index.json"  # 영상 파일 옆에 저장되는 미디어 인덱스 확장자
+MEDIA_PROBE_CACHE_SIZE = 256  # 메모리에 보관할 ffprobe 결과 수
+
 # 파일 경로
 INPUT_DIR = "input"  # 입력 디렉토리
 OUTPUT_DIR = "output"  # 출력 디렉토리
+CONVERTED_DIR_NAME = "converted"  # 클립 디렉토리 안의 9:16 변환 결과 디렉토리 (하위에 세션별)
+PREVIEW_DIR_NAME = "preview"  # 클립 디렉토리 안의 미리보기 디렉토리 (하위에 세션별)
+CLIP_THUMBNAIL_SUFFIX = ".thumb.jpg"  # 클립 썸네일 파일 접미사
+CLIP_THUMBNAIL_WIDTH = 320  # 클립 썸네일 너비(픽셀)
+PREVIEW_MODE = "seek"  # "seek": 플레이어에서 구간 재생, "render": ffmpeg로 구간 파일 생성
+PREVIEW_CACHE_SIZE = 16  # 세션별 미리보기 파일 캐시 최대 개수 ("render" 모드)
+WORKSPACE_DIR = "workspaces"  # 세션/작업별 작업 공간 상위 디렉토리
+WORKSPACE_QUOTA_BYTES = 20 * 1024**3  # 전체 작업 공간 최대 용량
+WORKSPACE_LEASE_TTL = 6 * 3600  # 이 시간 동안 사용되지 않은 작업 공간은 정리 대상(초)
 
 # 모델 설정
 DEFAULT_MODEL = "gpt-4o"  # 기본 모델명
 DEFAULT_TEMPERATURE = 0  # 온도값
+MAP_CHUNK_TOKENS = 2000  # Map 1회 입력 토큰 예산
+CHUNK_SEPARATOR = "\n\n"  # 청크 안에서 세그먼트 구분자
+REDUCE_CONTEXT_TOKENS = 32000  # Reduce 1회 입력 토큰 예산
+LLM_MAX_RETRIES = 2  # 파싱 실패 시 청크별 재시도 횟수
+TITLE_MAX_CONCURRENCY = 5  # 클립 제목 생성 동시 요청 수
+
+# 구간 선택 설정
+SELECTION_MODE = "llm"  # "llm" | "prerank" | "fast"
+PRERANK_TOP_K = 30  # prerank 모드에서 Map 단계로 보낼 세그먼트 수
+PRERANK_WEIGHTS = {  # 휴리스틱 특징값 가중치
+    "speech_rate": 1.0,
+    "reaction": 1.5,
+    "question": 0.3,  # 질문은 반응보다 약한 신호
+    "tfidf": 0.5,
+}
 
 # 언어 설정
 SUPPORTED_LANGUAGES = ["ko", "en"]  # 지원 언어
+
+# 캐시 설정
+CACHE_DIR = ".cache"  # 캐시 디렉토리
+CACHE_DB_PATH = f"{CACHE_DIR}/cache.sqlite3"  # 캐시 DB 파일
+METADATA_CACHE_TTL = 7 * 24 * 60 * 60  # 메타데이터 캐시 유효 시간(초)
+METADATA_CACHE_MAX_BYTES = 200 * 1024 * 1024  # 메타데이터 캐시 최대 크기(바이트)
+LLM_CACHE_TTL = 30 * 24 * 60 * 60  # LLM 응답 캐시 유효 시간(초)
+LLM_CACHE_MAX_BYTES = 50 * 1024 * 1024  # LLM 응답 캐시 최대 크기(바이트)
+TITLE_CHAIN_CACHE = False  # 제목 생성 체인 응답 캐시 사용 여부
+
+# 작업 큐 설정
+JOB_DB_PATH = f"{CACHE_DIR}/jobs.sqlite3"  # 작업 테이블 DB 파일
+JOB_MAX_WORKERS = 2  # 동시에 처리하는 영상 수
+JOB_POLL_INTERVAL = 2  # UI 진행 상황 갱신 주기(초)
+JOB_PROGRESS_STEP = 0.01  # 이 비율 이상 변할 때만 다운로드 진행률 기록
+
+# 배치 설정
+BATCH_MANIFEST_PATH = f"{OUTPUT_DIR}/batch_manifest.jsonl"  # 완료/실패 기록 파일
+BATCH_STAGE_LIMITS = {  # 여러 영상 처리 시 단계별 동시 실행 수
+    "metadata": 4,  # 메타데이터/자막 조회 (네트워크)
+    "select": 3,  # Map-Reduce (LLM)
+    "download": 2,  # 영상 다운로드 (대역폭)
+    "clips": 2,  # 클립 생성 (ffmpeg, 전역 스케줄러가 추가로 제한)
+}
+
+# HTTP 설정
+YOUTUBE_WATCH_URL = "https://www.youtube.com/watch"  # watch 페이지 URL
+HTTP_TIMEOUT = 10  # 요청 타임아웃(초)
+HTTP_POOL_SIZE = 10  # 커넥션 풀 크기
+HTTP_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
+)
+CATEGORY_SELENIUM_FALLBACK = False  # HTTP 실패 시 Selenium 사용 여부
+DEFAULT_CATEGORY = "People & Blogs"  # 카테고리 조회 실패 시 사용 (유튜브 업로드 기본값)
+
+# 다운로드 설정
+DOWNLOAD_MODE = "full"  # "full": 전체 영상, "range": 선택된 구간만 (DASH sidx 사용)
+RANGE_DOWNLOAD_PADDING = 5  # 구간 다운로드 시 앞뒤 여유 시간(초)
+RANGE_PROBE_BYTES = 64 * 1024  # 인덱스 위치를 모를 때 읽을 파일 앞부분 크기
+STREAM_TARGET_HEIGHT = 1080  # 목표 해상도(세로 픽셀), 1080x1920 출력 기준
+STREAM_ADAPTIVE = True  # 비디오/오디오 적응형 스트림을 따로 받아 합칠지 여부
+STREAM_VIDEO_CODEC = "avc1"  # 우선 사용할 비디오 코덱 (H.264)
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 병렬 다운로드 청크 크기(바이트)
+DOWNLOAD_MAX_WORKERS = 4  # 병렬 다운로드 동시 요청 수
+DOWNLOAD_MAX_RETRIES = 3  # 청크별 최대 재시도 횟수
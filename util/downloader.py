@@ -0,0 +1,1019 @@
+import asyncio
+import json
+import os
+import shutil
+import struct
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Set, Tuple
+
+import requests
+
+from .constants import *
+from .http import fetch_range, get_http_session
+from .profiler import profile, span
+from .scheduler import get_scheduler
+
+
+@dataclass
+class Fragment:
+    """sidx에 기록된 미디어 조각(moof+mdat) 정보.
+
+    Attributes:
+        start_time: 조각 시작 시간(초)
+        end_time: 조각 종료 시간(초)
+        offset: 파일 내 시작 바이트 위치
+        size: 조각 크기(바이트)
+    """
+
+    start_time: float
+    end_time: float
+    offset: int
+    size: int
+
+
+@dataclass
+class RangeSource:
+    """구간 다운로드가 가능한 단일 적응형 스트림(fMP4).
+
+    Attributes:
+        url: 스트림 URL (HTTP Range 요청 지원 필요)
+        init_end: 초기화 구간(ftyp+moov)의 마지막 바이트 위치
+        index_start: 세그먼트 인덱스(sidx) 시작 바이트 위치
+        index_end: 세그먼트 인덱스(sidx) 마지막 바이트 위치
+        extension: 저장 파일 확장자
+    """
+
+    url: str
+    init_end: int
+    index_start: int
+    index_end: int
+    extension: str = "mp4"
+
+
+@dataclass
+class MediaPiece:
+    """초기화 구간과 연속된 조각들만 담은 부분 파일.
+
+    Attributes:
+        path: 파일 경로
+        start_time: 첫 조각의 원본 기준 시작 시간(초)
+        end_time: 마지막 조각의 원본 기준 종료 시간(초)
+    """
+
+    path: str
+    start_time: float
+    end_time: float
+
+
+@dataclass
+class RangePieces:
+    """한 클립을 자르는 데 필요한 비디오/오디오 부분 파일."""
+
+    video: MediaPiece
+    audio: Optional[MediaPiece] = None
+
+
+def parse_boxes(data: bytes, base_offset: int = 0) -> List[Tuple[str, int, int]]:
+    """최상위 MP4 box 목록 반환.
+
+    Args:
+        data: 파일 앞부분 바이트
+        base_offset: data의 파일 내 시작 위치
+
+    Returns:
+        List[Tuple[str, int, int]]: (box 타입, 시작 위치, 마지막 바이트 위치) 리스트
+            (data 안에서 끝나지 않는 box도 헤더를 읽을 수 있으면 포함)
+    """
+    boxes = []
+    pos = 0
+    while pos + 8 <= len(data):
+        size, box_type = struct.unpack(">I4s", data[pos : pos + 8])
+        if size == 1:
+            if pos + 16 > len(data):
+                break
+            size = struct.unpack(">Q", data[pos + 8 : pos + 16])[0]
+        elif size == 0:
+            break  # 파일 끝까지 이어지는 box
+        if size < 8:
+            raise ValueError(f"Invalid MP4 box size at {base_offset + pos}")
+        start = base_offset + pos
+        boxes.append((box_type.decode("latin-1"), start, start + size - 1))
+        pos += size
+    return boxes
+
+
+def parse_sidx(data: bytes, box_offset: int) -> List[Fragment]:
+    """sidx box를 파싱하여 조각별 시간/바이트 위치 계산.
+
+    Args:
+        data: sidx box 전체 바이트
+        box_offset: sidx box의 파일 내 시작 위치
+
+    Returns:
+        List[Fragment]: 시간 순 조각 리스트
+    """
+    size, box_type = struct.unpack(">I4s", data[:8])
+    if box_type != b"sidx":
+        raise ValueError("Segment index is not a sidx box")
+    header = 8
+    if size == 1:
+        size = struct.unpack(">Q", data[8:16])[0]
+        header = 16
+
+    version = data[header]
+    pos = header + 4  # version + flags
+    _, timescale = struct.unpack(">II", data[pos : pos + 8])
+    pos += 8
+    if version == 0:
+        earliest_time, first_offset = struct.unpack(">II", data[pos : pos + 8])
+        pos += 8
+    else:
+        earliest_time, first_offset = struct.unpack(">QQ", data[pos : pos + 16])
+        pos += 16
+    reference_count = struct.unpack(">H", data[pos + 2 : pos + 4])[0]
+    pos += 4
+
+    # 첫 조각은 sidx box 바로 다음 바이트 + first_offset 위치에서 시작
+    offset = box_offset + size + first_offset
+    time = earliest_time
+    fragments = []
+    for _ in range(reference_count):
+        reference, duration, _ = struct.unpack(">III", data[pos : pos + 12])
+        pos += 12
+        if reference >> 31:
+            raise ValueError("Hierarchical sidx is not supported")
+        referenced_size = reference & 0x7FFFFFFF
+        fragments.append(
+            Fragment(
+                start_time=time / timescale,
+                end_time=(time + duration) / timescale,
+                offset=offset,
+                size=referenced_size,
+            )
+        )
+        offset += referenced_size
+        time += duration
+    return fragments
+
+
+def probe_range_source(url: str, extension: str = "mp4") -> RangeSource:
+    """인덱스 위치 정보가 없을 때 파일 앞부분을 읽어 RangeSource 생성."""
+    head = fetch_range(url, 0, RANGE_PROBE_BYTES - 1)
+    boxes = {box_type: (start, end) for box_type, start, end in parse_boxes(head)}
+    if "moov" not in boxes or "sidx" not in boxes:
+        raise ValueError("Stream has no leading moov/sidx (not a DASH on-demand file)")
+    return RangeSource(
+        url=url,
+        init_end=boxes["moov"][1],
+        index_start=boxes["sidx"][0],
+        index_end=boxes["sidx"][1],
+        extension=extension,
+    )
+
+
+def load_fragments(source: RangeSource) -> List[Fragment]:
+    """스트림의 sidx를 내려받아 조각 리스트 반환."""
+    data = fetch_range(source.url, source.index_start, source.index_end)
+    return parse_sidx(data, source.index_start)
+
+
+def merge_intervals(
+    time_segments: List[Tuple[int, int]], padding: float = RANGE_DOWNLOAD_PADDING
+) -> Tuple[List[Tuple[float, float]], List[int]]:
+    """패딩을 더한 구간 중 겹치는 것을 합침.
+
+    Returns:
+        Tuple[List[Tuple[float, float]], List[int]]: 합쳐진 구간 리스트와
+            각 세그먼트가 속한 합쳐진 구간의 인덱스
+    """
+    order = sorted(range(len(time_segments)), key=lambda i: time_segments[i][0])
+    merged, owners = [], [0] * len(time_segments)
+    for i in order:
+        start_t = max(0.0, time_segments[i][0] - padding)
+        end_t = time_segments[i][1] + padding
+        if merged and start_t <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end_t))
+        else:
+            merged.append((start_t, end_t))
+        owners[i] = len(merged) - 1
+    return merged, owners
+
+
+def _covering_fragments(
+    fragments: List[Fragment], start_t: float, end_t: float
+) -> List[Fragment]:
+    covering = [
+        fragment
+        for fragment in fragments
+        if fragment.end_time > start_t and fragment.start_time < end_t
+    ]
+    if not covering:
+        raise ValueError(f"No fragments cover {start_t:.1f}-{end_t:.1f}s")
+    return covering
+
+
+def write_piece(
+    read: Callable[[int, int], bytes],
+    init_end: int,
+    fragments: List[Fragment],
+    start_t: float,
+    end_t: float,
+    path: str,
+) -> MediaPiece:
+    """초기화 구간 + 구간을 덮는 연속 조각들을 하나의 파일로 저장.
+
+    Args:
+        read: [start, end] 바이트 구간을 읽는 함수 (HTTP 또는 로컬 파일)
+        init_end: 초기화 구간의 마지막 바이트 위치
+        fragments: 스트림의 조각 리스트
+        start_t: 시작 시간(초)
+        end_t: 종료 시간(초)
+        path: 저장 경로
+
+    Returns:
+        MediaPiece: 저장된 부분 파일
+    """
+    covering = _covering_fragments(fragments, start_t, end_t)
+    first, last = covering[0], covering[-1]
+    init = read(0, init_end)
+    media = read(first.offset, last.offset + last.size - 1)
+
+    temp_path = f"{path}.part"
+    with open(temp_path, "wb") as f:
+        f.write(init)
+        f.write(media)
+    os.replace(temp_path, path)
+    return MediaPiece(path, first.start_time, last.end_time)
+
+
+def _download_piece(
+    source: RangeSource,
+    fragments: List[Fragment],
+    start_t: float,
+    end_t: float,
+    path: str,
+) -> MediaPiece:
+    """HTTP Range 요청으로 부분 파일 저장."""
+    return write_piece(
+        lambda start, end: fetch_range(source.url, start, end),
+        source.init_end,
+        fragments,
+        start_t,
+        end_t,
+        path,
+    )
+
+
+@profile("download.ranges")
+async def download_time_ranges(
+    video_source: RangeSource,
+    audio_source: Optional[RangeSource],
+    time_segments: List[Tuple[int, int]],
+    output_dir: str,
+    padding: float = RANGE_DOWNLOAD_PADDING,
+) -> List[RangePieces]:
+    """세그먼트 구간(+패딩)을 덮는 조각만 내려받음.
+
+    겹치는 구간은 합쳐서 한 번만 받는다.
+
+    Args:
+        video_source: 비디오 스트림
+        audio_source: 오디오 스트림 (비디오에 오디오가 포함되면 None)
+        time_segments: 시작/종료 시간 튜플 리스트
+        output_dir: 부분 파일 저장 디렉토리
+        padding: 구간 앞뒤 여유 시간(초)
+
+    Returns:
+        List[RangePieces]: 세그먼트별 부분 파일
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    sources = [("video", video_source)]
+    if audio_source is not None:
+        sources.append(("audio", audio_source))
+
+    fragment_lists = await asyncio.gather(
+        *(asyncio.to_thread(load_fragments, source) for _, source in sources)
+    )
+    merged, owners = merge_intervals(time_segments, padding)
+
+    jobs = []
+    for idx, (start_t, end_t) in enumerate(merged):
+        for (kind, source), fragments in zip(sources, fragment_lists):
+            path = os.path.join(output_dir, f"range_{idx}.{kind}.{source.extension}")
+            jobs.append(
+                asyncio.to_thread(_download_piece, source, fragments, start_t, end_t, path)
+            )
+    results = await asyncio.gather(*jobs)
+
+    pieces_per_interval = [
+        results[i * len(sources) : (i + 1) * len(sources)] for i in range(len(merged))
+    ]
+    return [RangePieces(*pieces_per_interval[owner]) for owner in owners]
+
+
+def get_content_length(url: str) -> int:
+    """Range 요청의 Content-Range 헤더로 전체 크기 조회."""
+    response = get_http_session().get(
+        url, headers={"Range": "bytes=0-0"}, timeout=HTTP_TIMEOUT
+    )
+    response.raise_for_status()
+    content_range = response.headers.get("Content-Range", "")
+    if "/" in content_range and not content_range.endswith("/*"):
+        return int(content_range.rsplit("/", 1)[1])
+    return int(response.headers["Content-Length"])
+
+
+class DownloadCancelledError(RuntimeError):
+    """stop_event로 중단된 다운로드."""
+
+
+class ChunkedDownloader:
+    """HTTP Range 청크 병렬 다운로드.
+
+    공용 HTTP 세션으로 커넥션을 재사용하며, 완료된 청크 목록을 `.part.json`
+    파일에 기록하여 실패 후 다시 호출하면 남은 청크만 받는다.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        max_workers: int = DOWNLOAD_MAX_WORKERS,
+        max_retries: int = DOWNLOAD_MAX_RETRIES,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        prefix_callback: Optional[Callable[[int], None]] = None,
+        stop_event: Optional[threading.Event] = None,
+    ):
+        """
+        Args:
+            chunk_size: 청크 크기(바이트)
+            max_workers: 동시 요청 수
+            max_retries: 청크별 최대 재시도 횟수
+            progress_callback: (받은 바이트 수, 전체 바이트 수)를 받는 콜백
+            prefix_callback: 파일 앞에서부터 연속으로 받은 바이트 수가 늘어날 때
+                호출되는 콜백 (다운로드 중 부분 파일 추출용)
+            stop_event: 설정되면 남은 청크를 요청하지 않고 DownloadCancelledError 발생
+                (받은 청크는 .part.json에 남아 다음 호출에서 이어 받음)
+        """
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.progress_callback = progress_callback
+        self.prefix_callback = prefix_callback
+        self.stop_event = stop_event
+
+    def _load_state(self, state_path: str, total_size: int) -> Set[int]:
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        # 크기나 청크 단위가 다르면 처음부터 다시 받음
+        if state.get("size") != total_size or state.get("chunk_size") != self.chunk_size:
+            return set()
+        return set(state.get("done", []))
+
+    def _save_state(self, state_path: str, total_size: int, done: Set[int]) -> None:
+        temp_path = f"{state_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"size": total_size, "chunk_size": self.chunk_size, "done": sorted(done)},
+                f,
+            )
+        os.replace(temp_path, state_path)
+
+    def _fetch_chunk(self, url: str, part_path: str, start: int, end: int) -> int:
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                data = fetch_range(url, start, end)
+                if len(data) != end - start + 1:
+                    raise IOError(f"Short read: {len(data)} of {end - start + 1} bytes")
+                break
+            except (requests.RequestException, IOError) as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"Retry {attempt}/{self.max_retries} for bytes {start}-{end}: {str(e)}")
+        with open(part_path, "r+b") as f:
+            f.seek(start)
+            f.write(data)
+        return len(data)
+
+    @profile("download.stream")
+    def download(self, url: str, path: str, total_size: Optional[int] = None) -> str:
+        """url을 path로 다운로드 (동기 함수, 스레드에서 호출).
+
+        Args:
+            url: 다운로드 URL (HTTP Range 요청 지원 필요)
+            path: 저장 경로
+            total_size: 전체 크기 (없으면 조회)
+
+        Returns:
+            str: 저장 경로
+        """
+        total_size = total_size or get_content_length(url)
+        part_path = f"{path}.part"
+        state_path = f"{part_path}.json"
+
+        done = self._load_state(state_path, total_size) if os.path.exists(part_path) else set()
+        if not done or os.path.getsize(part_path) != total_size:
+            done = set()
+            with open(part_path, "wb") as f:
+                f.truncate(total_size)
+
+        chunk_count = (total_size + self.chunk_size - 1) // self.chunk_size
+        pending = [idx for idx in range(chunk_count) if idx not in done]
+        received = (chunk_count - len(pending)) * self.chunk_size
+        received = min(received, total_size)
+        lock = threading.Lock()
+        # 앞에서부터 연속으로 받은 청크 수
+        prefix_chunks = 0
+
+        def advance_prefix() -> None:
+            nonlocal prefix_chunks
+            previous = prefix_chunks
+            while prefix_chunks in done:
+                prefix_chunks += 1
+            if self.prefix_callback and prefix_chunks != previous:
+                self.prefix_callback(min(prefix_chunks * self.chunk_size, total_size))
+
+        def fetch(idx: int) -> None:
+            nonlocal received
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise DownloadCancelledError(f"Download cancelled: {url}")
+            start = idx * self.chunk_size
+            end = min(start + self.chunk_size, total_size) - 1
+            size = self._fetch_chunk(url, part_path, start, end)
+            with lock:
+                done.add(idx)
+                received += size
+                self._save_state(state_path, total_size, done)
+                if self.progress_callback:
+                    self.progress_callback(min(received, total_size), total_size)
+                advance_prefix()
+
+        with lock:
+            advance_prefix()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # 청크를 앞에서부터 순서대로 요청하여 연속 구간이 빨리 늘어나도록 함
+            # 실패한 청크가 있으면 예외 전파 (진행 상황은 .part.json에 남음)
+            list(pool.map(fetch, pending))
+
+        os.replace(part_path, path)
+        os.remove(state_path)
+        return path
+
+
+class StreamHorizon:
+    """다운로드 중인 fMP4 스트림에서 앞에서부터 연속으로 받은 시간 범위.
+
+    다운로드 스레드에서 update()를 호출하면 이벤트 루프에서 wait_until()로
+    기다리는 작업이 깨어난다.
+    """
+
+    def __init__(self, source: RangeSource, fragments: List[Fragment]):
+        self.source = source
+        self.fragments = fragments
+        self.received_bytes = 0
+        self._fragment_ends = [fragment.offset + fragment.size for fragment in fragments]
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def time(self) -> float:
+        """연속 수신 구간에 완전히 포함된 마지막 조각의 종료 시간(초)."""
+        if self.received_bytes <= self.source.init_end:
+            return 0.0
+        idx = bisect_right(self._fragment_ends, self.received_bytes) - 1
+        return self.fragments[idx].end_time if idx >= 0 else 0.0
+
+    def update(self, received_bytes: int) -> None:
+        """연속 수신 바이트 수 갱신 (다운로드 스레드에서 호출)."""
+        self.received_bytes = received_bytes
+        _call_threadsafe(self._loop, self._changed.set)
+
+    def fail(self, error: BaseException) -> None:
+        """다운로드 실패를 기다리는 작업에 전달."""
+        self._error = error
+        self._changed.set()
+
+    async def wait_until(self, t: float) -> None:
+        """t초까지 받을 때까지 대기 (영상 길이를 넘으면 끝까지)."""
+        t = min(t, self.fragments[-1].end_time)
+        while self.time < t:
+            if self._error is not None:
+                raise RuntimeError(f"Download failed: {str(self._error)}")
+            self._changed.clear()
+            if self.time >= t:
+                break
+            await self._changed.wait()
+
+
+def _call_threadsafe(loop: asyncio.AbstractEventLoop, callback) -> None:
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:
+        pass  # 이벤트 루프가 이미 종료됨
+
+
+def _read_local(path: str) -> Callable[[int, int], bytes]:
+    """다운로드 중(.part) 또는 완료된 파일에서 바이트 구간을 읽는 함수."""
+
+    def read(start: int, end: int) -> bytes:
+        try:
+            f = open(f"{path}.part", "rb")
+        except FileNotFoundError:
+            f = open(path, "rb")  # 읽기 직전에 다운로드가 끝나 이름이 바뀜
+        with f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+    return read
+
+
+class ProgressiveDownload:
+    """백그라운드 전체 다운로드 중 이미 받은 구간부터 부분 파일을 추출.
+
+    모든 스트림에 sidx(RangeSource)가 있으면 pieces_for()로 세그먼트 구간이
+    도착하는 즉시 부분 파일을 만들 수 있다. 스트림이 둘(비디오/오디오)이면
+    다운로드 후 ffmpeg 스트림 복사로 output_path에 합친다.
+    """
+
+    def __init__(
+        self,
+        streams: List[Tuple[str, str, Optional[RangeSource]]],
+        output_path: str,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ):
+        """
+        Args:
+            streams: (URL, 저장 경로, RangeSource 또는 None) 리스트 (비디오, 오디오 순)
+            output_path: 최종 영상 경로
+            progress_callback: (받은 바이트 수, 전체 바이트 수)를 받는 콜백
+        """
+        self.streams = streams
+        self.output_path = output_path
+        self.progress_callback = progress_callback
+        self.piece_dir = os.path.splitext(output_path)[0]
+        self.horizons: List[StreamHorizon] = []
+        self._task: Optional[asyncio.Task] = None
+        self._piece_count = 0
+        self._stop = threading.Event()
+
+    @property
+    def can_cut_early(self) -> bool:
+        return len(self.horizons) == len(self.streams)
+
+    async def start(self) -> None:
+        """크기/인덱스를 조회한 뒤 백그라운드 다운로드 시작."""
+        sizes = await asyncio.gather(
+            *(asyncio.to_thread(get_content_length, url) for url, _, _ in self.streams)
+        )
+        sources = [source for _, _, source in self.streams]
+        if all(sources):
+            try:
+                fragment_lists = await asyncio.gather(
+                    *(asyncio.to_thread(load_fragments, source) for source in sources)
+                )
+                self.horizons = [
+                    StreamHorizon(source, fragments)
+                    for source, fragments in zip(sources, fragment_lists)
+                ]
+            except (requests.RequestException, ValueError) as e:
+                print(f"Segment index unavailable, cutting after download: {str(e)}")
+        self._task = asyncio.create_task(self._run(sizes))
+
+    @profile("download")
+    async def _run(self, sizes: List[int]) -> None:
+        received = [0] * len(self.streams)
+
+        def make_progress(idx: int) -> Optional[Callable[[int, int], None]]:
+            if self.progress_callback is None:
+                return None
+
+            def callback(done: int, _total: int) -> None:
+                received[idx] = done
+                self.progress_callback(sum(received), sum(sizes))
+
+            return callback
+
+        try:
+            await asyncio.gather(
+                *(
+                    asyncio.to_thread(
+                        ChunkedDownloader(
+                            progress_callback=make_progress(idx),
+                            prefix_callback=(
+                                self.horizons[idx].update if self.horizons else None
+                            ),
+                            stop_event=self._stop,
+                        ).download,
+                        url,
+                        path,
+                        size,
+                    )
+                    for idx, ((url, path, _), size) in enumerate(zip(self.streams, sizes))
+                )
+            )
+            if self._stop.is_set():
+                raise DownloadCancelledError("Download cancelled")
+            if len(self.streams) > 1:
+                await self._mux()
+        except BaseException as e:
+            for horizon in self.horizons:
+                horizon.fail(e)
+            raise
+
+    @profile("download.mux")
+    async def _mux(self) -> None:
+        """재인코딩 없이 비디오/오디오 합치기."""
+        (_, video_path, _), (_, audio_path, _) = self.streams
+        returncode, _, stderr = await get_scheduler().run(
+            [
+                "ffmpeg",
+                "-y",
+                "-i",
+                video_path,
+                "-i",
+                audio_path,
+                "-map",
+                "0:v:0",
+                "-map",
+                "1:a:0",
+                "-c",
+                "copy",
+                "-movflags",
+                "+faststart",
+                self.output_path,
+            ]
+        )
+        if returncode != 0:
+            raise RuntimeError(
+                f"FFmpeg mux failed with return code {returncode}: "
+                f"{stderr.decode(errors='ignore')[-500:]}"
+            )
+
+    async def pieces_for(
+        self, start_t: float, end_t: float, padding: float = RANGE_DOWNLOAD_PADDING
+    ) -> RangePieces:
+        """구간(+패딩)이 도착하면 받은 파일에서 부분 파일 추출.
+
+        Args:
+            start_t: 시작 시간(초)
+            end_t: 종료 시간(초)
+            padding: 구간 앞뒤 여유 시간(초)
+
+        Returns:
+            RangePieces: 비디오/오디오 부분 파일
+        """
+        if not self.can_cut_early:
+            raise RuntimeError("Stream has no segment index for early cutting")
+        start_t, end_t = max(0.0, start_t - padding), end_t + padding
+        with span("download.wait_range", start=start_t, end=end_t):
+            await asyncio.gather(*(horizon.wait_until(end_t) for horizon in self.horizons))
+
+        os.makedirs(self.piece_dir, exist_ok=True)
+        piece_idx = self._piece_count
+        self._piece_count += 1
+        pieces = await asyncio.gather(
+            *(
+                asyncio.to_thread(
+                    write_piece,
+                    _read_local(path),
+                    horizon.source.init_end,
+                    horizon.fragments,
+                    start_t,
+                    end_t,
+                    os.path.join(
+                        self.piece_dir, f"early_{piece_idx}.{idx}.{horizon.source.extension}"
+                    ),
+                )
+                for idx, ((_, path, _), horizon) in enumerate(zip(self.streams, self.horizons))
+            )
+        )
+        return RangePieces(*pieces)
+
+    async def wait(self) -> None:
+        """전송(+합치기)이 끝날 때까지 대기 (실패하면 예외 전파).
+
+        대기하는 쪽이 취소되어도 다운로드는 계속된다.
+        """
+        await asyncio.shield(self._task)
+
+    async def cancel(self) -> None:
+        """백그라운드 다운로드 중단 (이후 단계가 실패했을 때 호출).
+
+        스레드에서 받고 있는 청크까지만 받고 멈출 때까지 기다린다. 부분 파일
+        대기(pieces_for)는 RuntimeError로 끝난다.
+        """
+        self._stop.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def finish(self) -> str:
+        """다운로드 완료까지 대기한 뒤 중간 파일 정리.
+
+        Returns:
+            str: 최종 영상 경로
+        """
+        await self._task
+        if len(self.streams) > 1:
+            for _, path, _ in self.streams:
+                os.remove(path)
+        shutil.rmtree(self.piece_dir, ignore_errors=True)
+        return self.output_path
+
+
+def stream_range_source(yt, stream, extension: str) -> RangeSource:
+    """pytubefix 스트림의 initRange/indexRange로 RangeSource 생성."""
+    for fmt in yt.streaming_data.get("adaptiveFormats", []):
+        if fmt.get("itag") == stream.itag and "indexRange" in fmt and "initRange" in fmt:
+            return RangeSource(
+                url=stream.url,
+                init_end=int(fmt["initRange"]["end"]),
+                index_start=int(fmt["indexRange"]["start"]),
+                index_end=int(fmt["indexRange"]["end"]),
+                extension=extension,
+            )
+    return probe_range_source(stream.url, extension)
+
+
+@dataclass(frozen=True)
+class StreamPolicy:
+    """다운로드 스트림 선택 정책.
+
+    Attributes:
+        target_height: 목표 해상도(세로 픽셀). 이상인 것 중 가장 작은 해상도를
+            고르고, 없으면 가장 높은 해상도를 사용
+        adaptive: True면 비디오/오디오 적응형 스트림을 따로 받아 합치고,
+            False면 프로그레시브 스트림 하나를 사용
+        video_codec: 우선 사용할 비디오 코덱 접두어 (없으면 다른 코덱 허용)
+    """
+
+    target_height: int = STREAM_TARGET_HEIGHT
+    adaptive: bool = STREAM_ADAPTIVE
+    video_codec: str = STREAM_VIDEO_CODEC
+
+
+def _height(stream) -> int:
+    return int(stream.resolution.rstrip("p")) if stream.resolution else 0
+
+
+def _pick_resolution(streams: list, target_height: int):
+    """목표 해상도 이상 중 가장 작은 스트림 (없으면 가장 큰 스트림)."""
+    if not streams:
+        return None
+    above = [stream for stream in streams if _height(stream) >= target_height]
+    if above:
+        return min(above, key=_height)
+    return max(streams, key=_height)
+
+
+def select_streams(yt, policy: Optional[StreamPolicy] = None) -> tuple:
+    """정책에 맞는 비디오/오디오 스트림 선택.
+
+    Args:
+        yt: pytubefix YouTube 객체
+        policy: 스트림 선택 정책 (없으면 기본값)
+
+    Returns:
+        tuple: (비디오 스트림, 오디오 스트림). 프로그레시브 스트림이면 오디오는 None
+    """
+    policy = policy or StreamPolicy()
+    if not policy.adaptive:
+        stream = _pick_resolution(
+            list(yt.streams.filter(progressive=True, file_extension="mp4")),
+            policy.target_height,
+        )
+        if stream is None:
+            raise ValueError("No progressive MP4 stream available")
+        return stream, None
+
+    video_streams = [
+        stream
+        for stream in yt.streams.filter(adaptive=True, only_video=True, mime_type="video/mp4")
+        if stream.resolution
+    ]
+    # 선호 코덱(H.264 등)이 있으면 해당 코덱 중에서 선택
+    preferred = [
+        stream
+        for stream in video_streams
+        if any(codec.startswith(policy.video_codec) for codec in stream.codecs)
+    ]
+    video_stream = _pick_resolution(preferred or video_streams, policy.target_height)
+    audio_stream = (
+        yt.streams.filter(adaptive=True, only_audio=True, mime_type="audio/mp4")
+        .order_by("abr")
+        .desc()
+        .first()
+    )
+    if video_stream is None or audio_stream is None:
+        raise ValueError("No adaptive MP4 streams available")
+    return video_stream, audio_stream
+
+
+def get_range_sources(
+    yt, policy: Optional[StreamPolicy] = None
+) -> Tuple[RangeSource, RangeSource]:
+    """구간 다운로드에 사용할 적응형 비디오/오디오 스트림 선택.
+
+    sidx가 있는 MP4 계열(video/mp4, audio/mp4)만 사용한다.
+
+    Args:
+        yt: pytubefix YouTube 객체
+        policy: 스트림 선택 정책 (adaptive 값은 무시)
+
+    Returns:
+        Tuple[RangeSource, RangeSource]: 비디오/오디오 스트림
+    """
+    policy = policy or StreamPolicy()
+    video_stream, audio_stream = select_streams(
+        yt, StreamPolicy(policy.target_height, True, policy.video_codec)
+    )
+    return (
+        stream_range_source(yt, video_stream, "mp4"),
+        stream_range_source(yt, audio_stream, "m4a"),
+    )
+
+
+if __name__ == "__main__":
+    # 로컬 HTTP 스텁 서버로 다운로드 검증
+    #   python -m util.downloader range video.mp4 audio.m4a 30 50  (구간 다운로드)
+    #   python -m util.downloader full video.mp4 [workers ...]      (병렬 청크 다운로드)
+    #   python -m util.downloader early video.mp4 audio.m4a 30 50  (다운로드 중 자르기)
+    #   python -m util.downloader cancel video.mp4 audio.m4a       (다운로드 중단)
+    # 픽스처는 sidx가 있는 DASH on-demand 형식이어야 함:
+    #   ffmpeg -i in.mp4 -an -c:v libx264 -movflags dash+global_sidx video.mp4
+    #   ffmpeg -i in.mp4 -vn -c:a aac -movflags dash+global_sidx audio.m4a
+    import functools
+    import http.server
+    import re
+    import sys
+    import tempfile
+    import threading
+    import time
+
+    from .ffmpeg_processor import FFmpegProcessor
+
+    class _LimitedReader:
+        """요청 구간 길이만큼만 읽는 파일 래퍼."""
+
+        def __init__(self, f, remaining):
+            self.f, self.remaining = f, remaining
+
+        def read(self, size=-1):
+            size = self.remaining if size < 0 else min(size, self.remaining)
+            data = self.f.read(size)
+            self.remaining -= len(data)
+            return data
+
+        def close(self):
+            self.f.close()
+
+    class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+        """Range 헤더를 지원하는 정적 파일 핸들러."""
+
+        delay = 0.0  # 요청마다 지연(초), 느린 네트워크 흉내
+
+        def send_head(self):
+            time.sleep(self.delay)
+            path = self.translate_path(self.path)
+            match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if not match or not os.path.isfile(path):
+                return super().send_head()
+            size = os.path.getsize(path)
+            start = int(match.group(1))
+            end = min(int(match.group(2) or size - 1), size - 1)
+            f = open(path, "rb")
+            f.seek(start)
+            self.send_response(206)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            return _LimitedReader(f, end - start + 1)
+
+        def log_message(self, *args):
+            pass
+
+    mode, video_path = sys.argv[1], sys.argv[2]
+    root = os.path.dirname(os.path.abspath(video_path))
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(RangeRequestHandler, directory=root)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    work_dir = tempfile.mkdtemp()
+
+    if mode == "early":
+        # 청크 요청마다 지연을 주어 다운로드 완료 전 자르기 효과 확인
+        RangeRequestHandler.delay = 0.1
+        audio_path = sys.argv[3]
+        start_t, end_t = int(sys.argv[4]), int(sys.argv[5])
+        video_url = f"{base_url}/{os.path.basename(video_path)}"
+        audio_url = f"{base_url}/{os.path.basename(audio_path)}"
+
+        async def run_early() -> None:
+            download = ProgressiveDownload(
+                [
+                    (video_url, os.path.join(work_dir, "v.mp4"), probe_range_source(video_url)),
+                    (
+                        audio_url,
+                        os.path.join(work_dir, "a.m4a"),
+                        probe_range_source(audio_url, "m4a"),
+                    ),
+                ],
+                os.path.join(work_dir, "full.mp4"),
+            )
+            start_time = time.perf_counter()
+            await download.start()
+            processor = FFmpegProcessor(os.path.join(work_dir, "clip.mp4"))
+            await processor.process_pieces(
+                [(start_t, end_t)], [download.pieces_for(start_t, end_t)]
+            )
+            clip_time = time.perf_counter() - start_time
+            await download.finish()
+            total_time = time.perf_counter() - start_time
+            print(f"Clip ready: {clip_time:.2f} s, download finished: {total_time:.2f} s")
+            print(f"Clip: {processor.get_output_path(0)}")
+
+        asyncio.run(run_early())
+    elif mode == "cancel":
+        # 다운로드 도중 중단하면 남은 청크를 요청하지 않고 대기 중인 자르기도 끝나는지 확인
+        RangeRequestHandler.delay = 0.1
+        audio_path = sys.argv[3]
+        video_url = f"{base_url}/{os.path.basename(video_path)}"
+        audio_url = f"{base_url}/{os.path.basename(audio_path)}"
+
+        async def run_cancel() -> None:
+            download = ProgressiveDownload(
+                [
+                    (video_url, os.path.join(work_dir, "v.mp4"), probe_range_source(video_url)),
+                    (
+                        audio_url,
+                        os.path.join(work_dir, "a.m4a"),
+                        probe_range_source(audio_url, "m4a"),
+                    ),
+                ],
+                os.path.join(work_dir, "full.mp4"),
+            )
+            await download.start()
+            end_t = download.horizons[0].fragments[-1].end_time
+            waiting = asyncio.ensure_future(download.pieces_for(end_t - 1, end_t))
+            await asyncio.sleep(0.15)
+            start_time = time.perf_counter()
+            await download.cancel()
+            print(f"Cancelled in {time.perf_counter() - start_time:.2f} s")
+            for _, path, _ in download.streams:
+                if not os.path.exists(f"{path}.part.json"):
+                    print(f"{os.path.basename(path)}: complete")
+                    continue
+                with open(f"{path}.part.json", "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                chunks = -(-state["size"] // state["chunk_size"])
+                print(f"{os.path.basename(path)}: {len(state['done'])}/{chunks} chunks")
+            try:
+                await waiting
+            except RuntimeError as e:
+                print(f"Pending piece: {str(e)}")
+
+        asyncio.run(run_cancel())
+    elif mode == "range":
+        audio_path = sys.argv[3]
+        start_t, end_t = int(sys.argv[4]), int(sys.argv[5])
+        video_source = probe_range_source(f"{base_url}/{os.path.basename(video_path)}")
+        audio_source = probe_range_source(
+            f"{base_url}/{os.path.basename(audio_path)}", "m4a"
+        )
+
+        start_time = time.perf_counter()
+        pieces = asyncio.run(
+            download_time_ranges(video_source, audio_source, [(start_t, end_t)], work_dir)
+        )
+        elapsed = time.perf_counter() - start_time
+        downloaded = sum(
+            os.path.getsize(piece.path) for piece in (pieces[0].video, pieces[0].audio)
+        )
+        total = os.path.getsize(video_path) + os.path.getsize(audio_path)
+        print(f"Downloaded {downloaded} / {total} bytes in {elapsed:.2f} s")
+
+        processor = FFmpegProcessor(os.path.join(work_dir, "clip.mp4"))
+        asyncio.run(processor.process_pieces([(start_t, end_t)], pieces))
+        print(f"Clip: {processor.get_output_path(0)}")
+    else:
+        url = f"{base_url}/{os.path.basename(video_path)}"
+        size = os.path.getsize(video_path)
+        print(f"{'workers':>8} {'chunk_mb':>9} {'wall_s':>8} {'MB/s':>8}")
+        for workers in [int(arg) for arg in sys.argv[3:]] or [1, 4, 8]:
+            output_path = os.path.join(work_dir, f"full_{workers}.mp4")
+            downloader = ChunkedDownloader(chunk_size=1024 * 1024, max_workers=workers)
+            start_time = time.perf_counter()
+            downloader.download(url, output_path)
+            elapsed = time.perf_counter() - start_time
+            with open(output_path, "rb") as f, open(video_path, "rb") as original:
+                assert f.read() == original.read(), "Downloaded file differs"
+            print(f"{workers:>8} {1:>9} {elapsed:>8.2f} {size / elapsed / 1e6:>8.1f}")
+
+    server.shutdown()
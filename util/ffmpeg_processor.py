@@ -1,9 +1,101 @@
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import List, Tuple
 import os
 import asyncio
+import inspect
+import shutil
 import subprocess
+import tempfile
 from .constants import *
+from .scheduler import PRIORITY_BATCH, get_scheduler
+from .media_index import get_media_index, probe_media
+from .profiler import span
+
+
+# 하드웨어 인코더 후보 (우선순위 순): (인코더, 필요한 hwaccel)
+_HW_ENCODERS = [("h264_nvenc", "cuda"), ("h264_videotoolbox", "videotoolbox")]
+
+
+@dataclass(frozen=True)
+class HardwareCapabilities:
+    """FFmpeg 하드웨어 가속 지원 정보.
+
+    Attributes:
+        hwaccels: ffmpeg가 지원하는 hwaccel 목록
+        h264_encoder: 실제 인코딩이 확인된 H.264 인코더 (없으면 libx264)
+    """
+
+    hwaccels: Tuple[str, ...]
+    h264_encoder: str
+
+    @property
+    def is_accelerated(self) -> bool:
+        return self.h264_encoder != "libx264"
+
+    def encoder_options(self) -> List[str]:
+        """재인코딩 시 사용할 비디오 인코더 옵션."""
+        return ["-c:v", self.h264_encoder]
+
+
+def _run_probe(cmd: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, capture_output=True, timeout=FFMPEG_PROBE_TIMEOUT)
+
+
+def _encoder_works(encoder: str) -> bool:
+    """짧은 테스트 영상을 실제로 인코딩하여 인코더 동작 여부 확인."""
+    result = _run_probe(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            "color=black:s=256x256:d=0.1",
+            "-c:v",
+            encoder,
+            "-f",
+            "null",
+            "-",
+        ]
+    )
+    return result.returncode == 0
+
+
+@lru_cache(maxsize=1)
+def probe_hardware() -> HardwareCapabilities:
+    """하드웨어 가속 지원 여부를 프로세스당 한 번만 확인 (결과 캐시).
+
+    ffmpeg -hwaccels/-encoders 목록에 있는 인코더 중 실제 테스트
+    인코딩에 성공한 것만 사용한다.
+
+    Returns:
+        HardwareCapabilities: 하드웨어 가속 지원 정보
+    """
+    try:
+        hwaccels_output = _run_probe(["ffmpeg", "-hide_banner", "-hwaccels"]).stdout
+        hwaccels = tuple(
+            line.strip()
+            for line in hwaccels_output.decode(errors="ignore").splitlines()[1:]
+            if line.strip()
+        )
+        encoders_output = _run_probe(
+            ["ffmpeg", "-hide_banner", "-encoders"]
+        ).stdout.decode(errors="ignore")
+
+        for encoder, hwaccel in _HW_ENCODERS:
+            if (
+                hwaccel in hwaccels
+                and f" {encoder} " in encoders_output
+                and _encoder_works(encoder)
+            ):
+                return HardwareCapabilities(hwaccels, encoder)
+        return HardwareCapabilities(hwaccels, "libx264")
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"Error probing hardware capabilities: {str(e)}")
+        return HardwareCapabilities((), "libx264")
 
 
 @dataclass
@@ -24,50 +116,228 @@ class VideoSegment:
 class FFmpegProcessor:
     """FFmpeg 기반 영상 처리 클래스."""
 
-    def __init__(self, input_path: str):
+    def __init__(
+        self,
+        input_path: str,
+        priority: int = PRIORITY_BATCH,
+        job_group: str = None,
+        output_dir: str = None,
+    ):
         """
         Args:
             input_path: 입력 영상 경로
+            priority: ffmpeg 작업 우선순위 (scheduler.PRIORITY_*)
+            job_group: 일괄 취소를 위한 작업 그룹 (세션 ID 등)
+            output_dir: 출력 디렉토리 (없으면 OUTPUT_DIR/입력 파일명)
         """
         self.input_path = input_path
-        self.output_dir = self._create_output_dir()
+        self.priority = priority
+        self.job_group = job_group
+        self.output_dir = self._create_output_dir(output_dir)
 
-    def _create_output_dir(self) -> str:
+    def _create_output_dir(self, output_dir: str = None) -> str:
         """출력 디렉토리 생성."""
-        base_name = os.path.splitext(os.path.basename(self.input_path))[0]
-        output_dir = os.path.join(OUTPUT_DIR, base_name)
+        if output_dir is None:
+            base_name = os.path.splitext(os.path.basename(self.input_path))[0]
+            output_dir = os.path.join(OUTPUT_DIR, base_name)
         os.makedirs(output_dir, exist_ok=True)
         return output_dir
 
-    async def process_segments(self, time_segments: List[Tuple[int, int]], titles: List[str] = None) -> None:
+    async def process_segments(
+        self,
+        time_segments: List[Tuple[int, int]],
+        titles: List[str] = None,
+        mode: str = CUT_MODE,
+    ) -> None:
         """영상 세그먼트 병렬 처리.
 
         Args:
             time_segments: 시작/종료 시간 튜플 리스트
             titles: 각 세그먼트의 제목 리스트 (선택사항)
+            mode: 자르기 방식
+                - "segment": 세그먼트마다 ffmpeg 실행
+                - "batch": 가까운 세그먼트끼리 묶어 묶음마다 ffmpeg 한 번으로 출력
+                - "smart": 키프레임 경계만 재인코딩하는 프레임 단위 정확한 자르기
         """
+        segments = [
+            VideoSegment(start_t, end_t, idx)
+            for idx, (start_t, end_t) in enumerate(time_segments)
+        ]
+        titles = titles or [None] * len(segments)
+
+        if mode == "batch" and len(segments) > 1:
+            tasks = [
+                self._process_cluster(cluster, titles)
+                for cluster in self._cluster_segments(segments)
+            ]
+            await asyncio.gather(*tasks)
+            return
+
+        process = self._process_segment_smart if mode == "smart" else self._process_segment
         tasks = []
-        for idx, (start_t, end_t) in enumerate(time_segments):
-            segment = VideoSegment(start_t, end_t, idx)
-            title = titles[idx] if titles else None
-            task = self._process_segment(segment, title)
+        for segment, title in zip(segments, titles):
+            task = self._traced(process(segment, title), segment)
+            tasks.append(task)
+        await asyncio.gather(*tasks)
+
+    async def _traced(self, coro, segment: VideoSegment) -> None:
+        """세그먼트 처리 구간 기록."""
+        with span(
+            "segment",
+            index=segment.index,
+            start=segment.start_time,
+            end=segment.end_time,
+        ):
+            await coro
+
+    @staticmethod
+    def _cluster_segments(segments: List[VideoSegment]) -> List[List[VideoSegment]]:
+        """간격이 BATCH_CUT_MAX_GAP 미만인 세그먼트끼리 시간 순으로 묶음.
+
+        다중 출력 ffmpeg는 묶음의 처음부터 끝까지 간격 구간도 모두 읽으므로,
+        멀리 떨어진 세그먼트는 따로 탐색(-ss)하는 편이 빠르다.
+        """
+        clusters = []
+        cluster_end = None
+        for segment in sorted(segments, key=lambda segment: segment.start_time):
+            if clusters and segment.start_time - cluster_end < BATCH_CUT_MAX_GAP:
+                clusters[-1].append(segment)
+                cluster_end = max(cluster_end, segment.end_time)
+            else:
+                clusters.append([segment])
+                cluster_end = segment.end_time
+        return clusters
+
+    async def _process_cluster(
+        self, segments: List[VideoSegment], titles: List[str]
+    ) -> None:
+        """묶음 하나를 처리 (한 개면 일반 자르기, 다중 출력 실패 시 세그먼트별 처리)."""
+        cluster_titles = [titles[segment.index] for segment in segments]
+        if len(segments) > 1:
+            if await self._process_batch(segments, cluster_titles):
+                return
+            print("Batch cut failed, falling back to per-segment processing")
+        tasks = []
+        for segment, title in zip(segments, cluster_titles):
+            task = self._traced(self._process_segment(segment, title), segment)
             tasks.append(task)
         await asyncio.gather(*tasks)
 
+    async def _process_batch(
+        self, segments: List[VideoSegment], titles: List[str]
+    ) -> bool:
+        """입력을 한 번만 읽어 묶음의 모든 세그먼트를 출력 (다중 출력 ffmpeg).
+
+        가장 이른 시작 지점으로 입력 탐색(-ss)한 뒤, 각 출력마다 상대
+        시작 시간/길이를 지정하여 스트림을 복사한다. 스트림 복사 중 출력
+        쪽 -ss는 키프레임 전의 비디오 패킷을 버리므로(오디오만 먼저 시작),
+        출력마다 시작 지점 이전의 키프레임부터 자른다. 세그먼트별 처리
+        (입력 -ss + 스트림 복사)와 같은 구간이 된다.
+
+        Returns:
+            bool: 성공 여부
+        """
+        index = await asyncio.to_thread(get_media_index, self.input_path)
+        starts = [
+            index.keyframe_before(max(0, segment.start_time)) for segment in segments
+        ]
+        base_time = min(starts)
+        cmd = ["ffmpeg", "-y", "-ss", f"{base_time:.6f}", "-i", self.input_path]
+
+        paths = []
+        for segment, title, start_t in zip(segments, titles, starts):
+            output_path = self.get_output_path(segment.index, title)
+            temp_path = f"{output_path}.temp.mp4"
+            paths.append((temp_path, output_path))
+            end_t = min(segment.end_time, index.duration)
+            cmd += [
+                "-ss",
+                f"{start_t - base_time:.6f}",  # 입력 탐색 지점 기준 상대 시작 시간
+                "-t",
+                f"{end_t - start_t:.6f}",
+                "-c:v",
+                "copy",
+                "-c:a",
+                "copy",
+                "-avoid_negative_ts",
+                "make_zero",
+                temp_path,
+            ]
+
+        try:
+            returncode, _, stderr = await get_scheduler().run(
+                cmd, priority=self.priority, group=self.job_group
+            )
+            if returncode != 0:
+                raise RuntimeError(
+                    f"FFmpeg failed with return code {returncode}: "
+                    f"{stderr.decode(errors='ignore')[-500:]}"
+                )
+            for temp_path, output_path in paths:
+                os.replace(temp_path, output_path)
+            return True
+        except Exception as e:
+            print(f"Error processing batch: {str(e)}")
+            for temp_path, _ in paths:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            return False
+
+    def get_output_path(self, index: int, title: str = None) -> str:
+        """세그먼트 출력 파일 경로 반환."""
+        # 제목이 없으면 기본 번호 사용
+        file_name = f"{title}.mp4" if title else f"output_{index}.mp4"
+        return os.path.join(self.output_dir, file_name)
+
+    def rename_output(self, index: int, title: str) -> str:
+        """기본 번호로 생성된 세그먼트 파일을 제목으로 변경.
+
+        같은 이름의 파일이 있으면 덮어쓰지 않고 _2, _3, ... 접미사를 붙인다.
+
+        Args:
+            index: 세그먼트 인덱스
+            title: 변경할 제목 (파일명으로 정규화된 값)
+
+        Returns:
+            str: 최종 파일 경로 (변경 실패 시 기존 경로)
+        """
+        source_path = self.get_output_path(index)
+        if not title:
+            return source_path
+        candidate, suffix = title, 1
+        while True:
+            target_path = self.get_output_path(index, candidate)
+            try:
+                # 하드 링크는 대상이 있으면 실패하므로 확인과 변경 사이에 덮어쓰지 않음
+                os.link(source_path, target_path)
+            except FileExistsError:
+                suffix += 1
+                candidate = f"{title}_{suffix}"
+                continue
+            except OSError as e:
+                print(f"Error renaming segment {index}: {str(e)}")
+                return source_path
+            os.remove(source_path)
+            return target_path
+
     async def _process_segment(self, segment: VideoSegment, title: str = None) -> None:
         """개별 세그먼트 처리."""
-        # 제목이 없으면 기본 번호 사용
-        file_name = f"{title}.mp4" if title else f"output_{segment.index}.mp4"
-        output_path = os.path.join(self.output_dir, file_name)
+        output_path = self.get_output_path(segment.index, title)
         temp_path = f"{output_path}.temp.mp4"
 
         try:
-            duration = segment.end_time - segment.start_time
+            # 영상 범위를 벗어나지 않도록 구간 보정 (길이만 필요하므로 패킷 스캔 없이 조회)
+            start_t = max(0, segment.start_time)
+            probe = await asyncio.to_thread(probe_media, self.input_path)
+            end_t = min(segment.end_time, probe["duration"])
+            duration = end_t - start_t
+            if duration <= 0:
+                raise ValueError("Invalid time segment")
             cmd = [
                 "ffmpeg",
                 "-y",  # 기존 파일 덮어쓰기
                 "-ss",
-                str(segment.start_time),  # 시작 시간
+                str(start_t),  # 시작 시간
                 "-i",
                 self.input_path,  # 입력 파일
                 "-t",
@@ -81,71 +351,320 @@ class FFmpegProcessor:
                 temp_path,
             ]
 
-            # GPU 가속 지원 확인 및 적용
-            if self._check_gpu_support():
-                cmd = self._add_gpu_options(cmd)
-
-            process = await asyncio.create_subprocess_exec(
-                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            # 스트림 복사(-c copy)는 디코딩/인코딩이 없으므로 하드웨어 가속 옵션을 적용하지 않음
+            returncode, _, _ = await get_scheduler().run(
+                cmd, priority=self.priority, group=self.job_group
             )
 
-            await process.communicate()
-
-            if process.returncode == 0 and os.path.exists(temp_path):
+            if returncode == 0 and os.path.exists(temp_path):
                 if os.path.exists(output_path):
                     os.remove(output_path)
                 os.rename(temp_path, output_path)
             else:
-                raise RuntimeError(
-                    f"FFmpeg failed with return code {process.returncode}"
-                )
+                raise RuntimeError(f"FFmpeg failed with return code {returncode}")
 
         except Exception as e:
             print(f"Error processing segment {segment.index}: {str(e)}")
             if os.path.exists(temp_path):
                 os.remove(temp_path)
 
-    def _check_gpu_support(self) -> bool:
-        """GPU 가속 지원 여부 확인."""
+    async def process_pieces(
+        self,
+        time_segments: List[Tuple[int, int]],
+        pieces: list,
+        titles: List[str] = None,
+    ) -> None:
+        """구간 다운로드된 부분 파일에서 세그먼트 병렬 처리.
+
+        Args:
+            time_segments: 원본 기준 시작/종료 시간 튜플 리스트
+            pieces: 세그먼트별 downloader.RangePieces 또는 이를 반환하는 awaitable
+                (다운로드 중이면 해당 구간이 도착하는 대로 세그먼트별로 처리)
+            titles: 각 세그먼트의 제목 리스트 (선택사항)
+        """
+        titles = titles or [None] * len(time_segments)
+        tasks = []
+        for idx, ((start_t, end_t), segment_pieces, title) in enumerate(
+            zip(time_segments, pieces, titles)
+        ):
+            segment = VideoSegment(start_t, end_t, idx)
+            task = self._traced(self._process_piece(segment, segment_pieces, title), segment)
+            tasks.append(task)
+        await asyncio.gather(*tasks)
+
+    async def _process_piece(self, segment: VideoSegment, pieces, title: str = None) -> None:
+        """부분 파일에서 개별 세그먼트 처리 (비디오/오디오 스트림 복사로 합침)."""
+        output_path = self.get_output_path(segment.index, title)
+        temp_path = f"{output_path}.temp.mp4"
+
         try:
-            # NVIDIA GPU 확인
-            result = subprocess.run(["nvidia-smi"], capture_output=True)
-            if result.returncode == 0:
-                return True
-
-            # Apple Silicon 확인
-            if os.path.exists("/usr/sbin/sysctl"):
-                result = subprocess.run(
-                    ["sysctl", "machdep.cpu.brand_string"], capture_output=True
-                )
-                if b"Apple" in result.stdout:
-                    return True
+            if inspect.isawaitable(pieces):
+                pieces = await pieces
+            # 부분 파일이 덮는 범위를 벗어나지 않도록 구간 보정
+            start_t = max(segment.start_time, pieces.video.start_time)
+            end_t = min(segment.end_time, pieces.video.end_time)
+            if end_t - start_t <= 0:
+                raise ValueError("Invalid time segment")
 
-            return False
-        except:
-            return False
+            # 부분 파일은 첫 조각의 시간부터 시작하므로 상대 위치로 탐색
+            cmd = [
+                "ffmpeg",
+                "-y",
+                "-ss",
+                f"{start_t - pieces.video.start_time:.6f}",
+                "-i",
+                pieces.video.path,
+            ]
+            maps = ["-map", "0:v:0", "-map", "0:a:0?"]
+            if pieces.audio is not None:
+                cmd += [
+                    "-ss",
+                    f"{max(0, start_t - pieces.audio.start_time):.6f}",
+                    "-i",
+                    pieces.audio.path,
+                ]
+                maps = ["-map", "0:v:0", "-map", "1:a:0"]
+            cmd += [
+                *maps,
+                "-t",
+                f"{end_t - start_t:.6f}",
+                "-c",
+                "copy",
+                "-avoid_negative_ts",
+                "make_zero",
+                temp_path,
+            ]
+            await self._run(cmd)
+            os.replace(temp_path, output_path)
+
+        except Exception as e:
+            print(f"Error processing segment {segment.index}: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    async def _run(self, cmd: List[str]) -> None:
+        """스케줄러를 통해 ffmpeg 실행 (실패 시 RuntimeError)."""
+        returncode, _, stderr = await get_scheduler().run(
+            cmd, priority=self.priority, group=self.job_group
+        )
+        if returncode != 0:
+            raise RuntimeError(
+                f"FFmpeg failed with return code {returncode}: "
+                f"{stderr.decode(errors='ignore')[-500:]}"
+            )
+
+    def _encode_video_cmd(
+        self, start: float, duration: float, output: str, stream: dict
+    ) -> List[str]:
+        """구간 비디오 재인코딩 명령 (복사 구간과 이어 붙일 수 있도록 형식 일치)."""
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-ss",
+            f"{start:.6f}",
+            "-i",
+            self.input_path,
+            "-t",
+            f"{duration:.6f}",
+            "-an",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-crf",
+            "18",
+            "-pix_fmt",
+            stream.get("pix_fmt", "yuv420p"),
+        ]
+        profile = SMART_CUT_X264_PROFILES.get(stream.get("profile"))
+        if profile:
+            cmd += ["-profile:v", profile]
+        level = stream.get("level")
+        if level and level >= 10:
+            # ffprobe는 레벨 3.1을 31로 표시 (1b는 9로 표시되어 제외)
+            cmd += ["-level:v", f"{level / 10:.1f}"]
+        return cmd + [
+            "-video_track_timescale",
+            stream["time_base"].split("/")[1],
+            "-avoid_negative_ts",
+            "make_zero",
+            output,
+        ]
+
+    async def _process_segment_smart(
+        self, segment: VideoSegment, title: str = None
+    ) -> None:
+        """키프레임 기반 스마트 자르기.
+
+        시작/종료 지점이 속한 일부 GOP(head/tail)만 재인코딩하고 키프레임으로
+        정렬된 중간 구간은 스트림 복사한 뒤 이어 붙인다. 오디오는 구간
+        전체를 정확한 시간으로 다시 인코딩하여 합친다.
+
+        재인코딩 구간과 복사 구간은 SPS/PPS가 다르다. avc1은 첫 구간의 avcC
+        하나만 가지므로 복사 구간이 잘못된 파라미터 세트로 디코딩될 수 있어,
+        concat 단계에서 구간마다 키프레임 앞에 자신의 SPS/PPS를 넣고
+        (auto_convert) 최종 MP4는 avc3(샘플 내 파라미터 세트)로 저장한다.
+        """
+        output_path = self.get_output_path(segment.index, title)
+        temp_path = f"{output_path}.temp.mp4"
+        work_dir = tempfile.mkdtemp(dir=self.output_dir)
 
-    def _add_gpu_options(self, cmd: list) -> list:
-        """GPU 가속 옵션 추가."""
         try:
-            # NVIDIA GPU용 옵션
-            if subprocess.run(["nvidia-smi"], capture_output=True).returncode == 0:
-                return [
-                    "ffmpeg",
-                    "-hwaccel",
-                    "cuda",
-                    "-hwaccel_output_format",
-                    "cuda",
-                ] + cmd[1:]
-
-            # Apple Silicon용 옵션
-            if os.path.exists("/usr/sbin/sysctl"):
-                result = subprocess.run(
-                    ["sysctl", "machdep.cpu.brand_string"], capture_output=True
+            index = await asyncio.to_thread(get_media_index, self.input_path)
+            stream = index.video_stream or {}
+            if stream.get("codec_name") != "h264":
+                # 재인코딩 구간과 형식을 맞출 수 없으면 일반 자르기 사용
+                await self._process_segment(segment, title)
+                return
+
+            start_t = float(max(0, segment.start_time))
+            end_t = float(min(segment.end_time, index.duration))
+
+            # 구간 안의 첫/마지막 키프레임
+            head_end = index.keyframe_after(start_t)
+            tail_start = index.keyframe_before(end_t)
+            parts = []
+            jobs = []
+
+            if head_end is not None and tail_start > head_end:
+                if head_end - start_t > SMART_CUT_EPSILON:
+                    head_path = os.path.join(work_dir, "head.mp4")
+                    jobs.append(
+                        self._run(
+                            self._encode_video_cmd(
+                                start_t, head_end - start_t, head_path, stream
+                            )
+                        )
+                    )
+                    parts.append(head_path)
+
+                middle_path = os.path.join(work_dir, "middle.mp4")
+                jobs.append(
+                    self._run(
+                        [
+                            "ffmpeg",
+                            "-y",
+                            "-ss",
+                            # 반올림 오차로 이전 키프레임으로 탐색되지 않도록 보정
+                            f"{head_end + SMART_CUT_EPSILON / 2:.6f}",
+                            "-i",
+                            self.input_path,
+                            # 시간 대신 패킷 수로 잘라 tail 키프레임이 섞이지 않도록
+                            "-frames:v",
+                            str(index.packets_between(head_end, tail_start)),
+                            "-an",
+                            "-c:v",
+                            "copy",
+                            "-video_track_timescale",
+                            stream["time_base"].split("/")[1],
+                            "-avoid_negative_ts",
+                            "make_zero",
+                            middle_path,
+                        ]
+                    )
                 )
-                if b"Apple" in result.stdout:
-                    return ["ffmpeg", "-hwaccel", "videotoolbox"] + cmd[1:]
+                parts.append(middle_path)
+
+                if end_t - tail_start > SMART_CUT_EPSILON:
+                    tail_path = os.path.join(work_dir, "tail.mp4")
+                    jobs.append(
+                        self._run(
+                            self._encode_video_cmd(
+                                tail_start, end_t - tail_start, tail_path, stream
+                            )
+                        )
+                    )
+                    parts.append(tail_path)
+            else:
+                # 구간 안에 온전한 GOP가 없으면 전체 재인코딩
+                full_path = os.path.join(work_dir, "full.mp4")
+                jobs.append(
+                    self._run(
+                        self._encode_video_cmd(
+                            start_t, end_t - start_t, full_path, stream
+                        )
+                    )
+                )
+                parts.append(full_path)
+
+            await asyncio.gather(*jobs)
+
+            list_path = os.path.join(work_dir, "parts.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                for part in parts:
+                    f.write(f"file '{os.path.abspath(part)}'\n")
+
+            # 비디오 이어 붙이기 + 정확한 구간의 오디오 인코딩을 한 번에 처리
+            await self._run(
+                [
+                    "ffmpeg",
+                    "-y",
+                    "-f",
+                    "concat",
+                    "-safe",
+                    "0",
+                    # 구간마다 자신의 SPS/PPS를 키프레임 앞에 삽입
+                    "-auto_convert",
+                    "1",
+                    "-i",
+                    list_path,
+                    "-ss",
+                    f"{start_t:.6f}",
+                    "-t",
+                    f"{end_t - start_t:.6f}",
+                    "-i",
+                    self.input_path,
+                    "-map",
+                    "0:v:0",
+                    "-map",
+                    "1:a:0?",
+                    "-c:v",
+                    "copy",
+                    "-tag:v",
+                    "avc3",
+                    "-video_track_timescale",
+                    stream["time_base"].split("/")[1],
+                    "-c:a",
+                    "aac",
+                    "-shortest",
+                    temp_path,
+                ]
+            )
+            os.replace(temp_path, output_path)
+
+        except Exception as e:
+            print(f"Error processing segment {segment.index}: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    # 세그먼트별 실행 vs 단일 실행(batch) 벤치마크
+    #   python -m util.ffmpeg_processor input.mp4
+    import resource
+    import sys
+    import time
+
+    from .video_utils import get_video_duration
+
+    input_path = sys.argv[1]
+    duration = get_video_duration(input_path)
 
-            return cmd
-        except:
-            return cmd
+    print(f"{'clips':>6} {'mode':>8} {'wall_s':>8} {'cpu_s':>8}")
+    for clip_count in [3, 5, 20]:
+        # 영상 전체에 고르게 분포한 80초 구간
+        step = max((duration - 80) / clip_count, 1)
+        time_segments = [
+            (int(i * step), int(i * step) + 80) for i in range(clip_count)
+        ]
+        for mode in ["segment", "batch"]:
+            processor = FFmpegProcessor(input_path)
+            usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+            cpu_before = usage.ru_utime + usage.ru_stime
+            start_time = time.perf_counter()
+            asyncio.run(processor.process_segments(time_segments, mode=mode))
+            wall = time.perf_counter() - start_time
+            usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+            cpu = usage.ru_utime + usage.ru_stime - cpu_before
+            print(f"{clip_count:>6} {mode:>8} {wall:>8.2f} {cpu:>8.2f}")
@@ -0,0 +1,56 @@
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .constants import *
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """프로세스 공용 HTTP 세션 반환 (커넥션 풀 재사용)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(
+                {
+                    "User-Agent": HTTP_USER_AGENT,
+                    "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+                }
+            )
+            # EU 동의 페이지로 리다이렉트되는 것을 방지
+            session.cookies.set("CONSENT", "YES+cb", domain=".youtube.com")
+            _session = session
+        return _session
+
+
+def fetch_range(url: str, start: int, end: int, timeout: float = HTTP_TIMEOUT) -> bytes:
+    """HTTP Range 요청으로 [start, end] 바이트 구간 조회.
+
+    Args:
+        url: 요청 URL
+        start: 시작 바이트 위치
+        end: 종료 바이트 위치 (포함)
+        timeout: 요청 타임아웃(초)
+
+    Returns:
+        bytes: 응답 본문
+    """
+    response = get_http_session().get(
+        url, headers={"Range": f"bytes={start}-{end}"}, timeout=timeout
+    )
+    response.raise_for_status()
+    if response.status_code != 206 and start > 0:
+        raise RuntimeError(f"Server ignored range request (status {response.status_code})")
+    # Range를 무시하고 전체를 보낸 경우(200) 필요한 구간만 사용
+    return response.content[: end - start + 1]
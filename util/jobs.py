@@ -0,0 +1,267 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, List, Optional
+
+from .clip_registry import ClipInfo, scan_clips
+from .constants import *
+from .workspace import Workspace, get_workspace_manager
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+
+@dataclass
+class Job:
+    """작업 테이블의 한 행.
+
+    Attributes:
+        job_id: 작업 ID
+        url: 유튜브 URL
+        status: 상태 (queued, running, done, failed)
+        stage: 현재 처리 단계 (metadata, select, clips)
+        progress: 다운로드 진행률 (0.0 ~ 1.0)
+        workspace_id: 결과가 저장된 작업 공간 ID
+        record_profile: 처리 타임라인(Chrome trace) 기록 여부
+        profile_path: 처리 타임라인 저장 경로 (실행 전이거나 기록하지 않으면 None)
+        result: 완료된 클립 메타데이터 (ClipInfo 필드 dict 리스트)
+        error: 실패 원인
+        created_at: 등록 시각
+        updated_at: 마지막 갱신 시각
+    """
+
+    job_id: str
+    url: str
+    status: str
+    stage: str = ""
+    progress: float = 0.0
+    workspace_id: Optional[str] = None
+    record_profile: bool = False
+    profile_path: Optional[str] = None
+    result: List[dict] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def clips(self) -> List[ClipInfo]:
+        return [ClipInfo(**clip) for clip in self.result]
+
+
+_COLUMNS = [
+    "job_id",
+    "url",
+    "status",
+    "stage",
+    "progress",
+    "workspace_id",
+    "record_profile",
+    "profile_path",
+    "result",
+    "error",
+    "created_at",
+    "updated_at",
+]
+
+
+class JobQueue:
+    """SQLite 작업 테이블 기반 백그라운드 처리 큐.
+
+    작업은 워커 스레드마다 별도 이벤트 루프에서 실행되므로 Streamlit
+    스크립트 스레드를 막지 않는다. 상태/진행률/결과는 DB에 기록되어
+    브라우저를 새로고침해도 작업 ID로 다시 조회할 수 있다. 같은 URL의
+    작업이 대기/실행 중이면 새로 등록하지 않고 기존 작업 ID를 반환한다.
+    """
+
+    def __init__(
+        self,
+        pipeline: Callable[..., Awaitable[None]],
+        path: str = JOB_DB_PATH,
+        max_workers: int = JOB_MAX_WORKERS,
+    ):
+        """
+        Args:
+            pipeline: 영상 처리 함수 (main.main과 같은 시그니처)
+            path: SQLite DB 파일 경로
+            max_workers: 동시에 처리하는 작업 수
+        """
+        self.pipeline = pipeline
+        self.path = path
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT NOT NULL DEFAULT '',
+                progress REAL NOT NULL DEFAULT 0,
+                workspace_id TEXT,
+                record_profile INTEGER NOT NULL DEFAULT 0,
+                profile_path TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_url ON jobs (url, status)")
+        self._conn.commit()
+        self._recover()
+
+    def _recover(self) -> None:
+        """이전 프로세스에서 끝나지 않은 작업 정리.
+
+        실행 중이던 작업은 중간 결과를 신뢰할 수 없으므로 실패 처리하고,
+        대기 중이던 작업은 다시 큐에 넣는다.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status = ?",
+                (JOB_FAILED, "interrupted", time.time(), JOB_RUNNING),
+            )
+            self._conn.commit()
+            queued = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status = ? ORDER BY created_at",
+                (JOB_QUEUED,),
+            ).fetchall()
+        for (job_id,) in queued:
+            self._executor.submit(self._run_job, job_id)
+
+    def submit(self, url: str, record_profile: bool = False) -> str:
+        """작업 등록 (같은 URL이 처리 중이면 기존 작업 ID 반환).
+
+        Args:
+            url: 유튜브 URL
+            record_profile: 처리 타임라인(Chrome trace) 기록 여부
+
+        Returns:
+            str: 작업 ID
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE url = ? AND status IN (?, ?)"
+                " ORDER BY created_at LIMIT 1",
+                (url, *ACTIVE_STATUSES),
+            ).fetchone()
+            if row is not None:
+                return row[0]
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO jobs"
+                " (job_id, url, status, record_profile, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, url, JOB_QUEUED, int(record_profile), now, now),
+            )
+            self._conn.commit()
+        self._executor.submit(self._run_job, job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """작업 조회 (없으면 None)."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        values = dict(zip(_COLUMNS, row))
+        values["record_profile"] = bool(values["record_profile"])
+        values["result"] = json.loads(values["result"]) if values["result"] else []
+        return Job(**values)
+
+    def update(self, job_id: str, **fields) -> None:
+        """작업 행 갱신."""
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], ensure_ascii=False)
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                (*fields.values(), job_id),
+            )
+            self._conn.commit()
+
+    def _progress_callback(self, job_id: str) -> Callable[[int, int], None]:
+        """다운로드 진행률을 JOB_PROGRESS_STEP 단위로만 기록하는 콜백."""
+        last = [0.0]
+
+        def callback(received: int, total: int) -> None:
+            progress = received / total if total else 0.0
+            if progress - last[0] >= JOB_PROGRESS_STEP or received >= total:
+                last[0] = progress
+                self.update(job_id, progress=progress)
+
+        return callback
+
+    def _run_job(self, job_id: str) -> None:
+        """워커 스레드에서 작업 하나를 처리."""
+        job = self.get(job_id)
+        if job is None or job.status != JOB_QUEUED:
+            return
+
+        manager = get_workspace_manager()
+        workspace = manager.create(prefix=job_id[:8])
+        profile_path = (
+            os.path.join(workspace.root, "profile.json")
+            if job.record_profile
+            else None
+        )
+        self.update(
+            job_id,
+            status=JOB_RUNNING,
+            workspace_id=workspace.workspace_id,
+            profile_path=profile_path,
+        )
+        try:
+            clips = asyncio.run(self._execute(job, workspace, profile_path))
+            self.update(
+                job_id,
+                status=JOB_DONE,
+                progress=1.0,
+                result=[asdict(clip) for clip in clips],
+            )
+        except Exception as e:
+            print(f"Job {job_id} failed: {str(e)}")
+            self.update(job_id, status=JOB_FAILED, error=str(e))
+        finally:
+            # 결과는 용량 한도 내에서 남겨 두고, 조회하는 세션이 다시 참조
+            manager.release(workspace)
+
+    async def _execute(
+        self, job: Job, workspace: Workspace, profile_path: Optional[str]
+    ) -> List[ClipInfo]:
+        await self.pipeline(
+            job.url,
+            job_group=job.job_id,
+            profile_path=profile_path,
+            input_dir=workspace.input_dir,
+            output_dir=workspace.output_dir,
+            on_stage=lambda stage: self.update(job.job_id, stage=stage),
+            progress_callback=self._progress_callback(job.job_id),
+        )
+        # 결과 클립 메타데이터만 저장 (영상은 파일 경로로 참조)
+        return await scan_clips(workspace.output_dir, job_group=job.job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
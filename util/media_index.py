@@ -0,0 +1,226 @@
+import json
+import os
+import subprocess
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from .constants import *
+
+
+@dataclass
+class MediaIndex:
+    """입력 영상별 미디어 인덱스.
+
+    Attributes:
+        path: 영상 파일 경로
+        mtime: 인덱스 생성 시점의 파일 수정 시각
+        size: 인덱스 생성 시점의 파일 크기(바이트)
+        duration: 영상 길이(초)
+        streams: 스트림 정보 (codec_type, codec_name, pix_fmt, time_base 등)
+        keyframes: 첫 번째 비디오 스트림의 키프레임 시간(초)
+        keyframe_offsets: 각 키프레임 패킷의 파일 내 바이트 위치
+        keyframe_packets: 각 키프레임 패킷의 디코딩 순서 번호
+    """
+
+    path: str
+    mtime: float
+    size: int
+    duration: float
+    streams: List[dict] = field(default_factory=list)
+    keyframes: List[float] = field(default_factory=list)
+    keyframe_offsets: List[int] = field(default_factory=list)
+    keyframe_packets: List[int] = field(default_factory=list)
+
+    @property
+    def video_stream(self) -> Optional[dict]:
+        for stream in self.streams:
+            if stream.get("codec_type") == "video":
+                return stream
+        return None
+
+    def keyframe_before(self, t: float) -> float:
+        """t 이하의 마지막 키프레임 시간 (없으면 0)."""
+        idx = bisect_right(self.keyframes, t) - 1
+        return self.keyframes[idx] if idx >= 0 else 0.0
+
+    def keyframe_after(self, t: float) -> Optional[float]:
+        """t 이상의 첫 키프레임 시간 (없으면 None)."""
+        idx = bisect_left(self.keyframes, t)
+        return self.keyframes[idx] if idx < len(self.keyframes) else None
+
+    def packets_between(self, start: float, end: float) -> int:
+        """키프레임 start부터 키프레임 end 직전까지의 비디오 패킷 수 (디코딩 순서).
+
+        B-프레임이 있으면 DTS가 PTS보다 늦어 시간(-t)으로 자른 스트림 복사에
+        다음 GOP의 패킷이 섞이므로, 패킷 수(-frames:v)로 자를 때 사용한다.
+        """
+        first = self.keyframe_packets[self.keyframes.index(start)]
+        last = self.keyframe_packets[self.keyframes.index(end)]
+        return last - first
+
+    def is_valid_for(self, path: str) -> bool:
+        stat = os.stat(path)
+        return stat.st_mtime == self.mtime and stat.st_size == self.size
+
+
+_STREAM_FIELDS = [
+    "index",
+    "codec_type",
+    "codec_name",
+    "profile",
+    "level",
+    "pix_fmt",
+    "width",
+    "height",
+    "time_base",
+    "r_frame_rate",
+    "sample_rate",
+    "channels",
+    "start_time",
+    "duration",
+]
+
+_indexes: Dict[str, MediaIndex] = {}
+_probes: Dict[tuple, dict] = {}
+_indexes_lock = threading.Lock()
+
+
+def _index_path(path: str) -> str:
+    return f"{path}{MEDIA_INDEX_SUFFIX}"
+
+
+def _run_ffprobe(args: List[str]) -> str:
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", *args], capture_output=True, check=True
+    )
+    return result.stdout.decode()
+
+
+def probe_media(path: str) -> dict:
+    """영상 길이와 스트림 정보만 빠르게 조회 (패킷 스캔 없음, 파일별 캐시).
+
+    Args:
+        path: 영상 파일 경로
+
+    Returns:
+        dict: duration(초), streams(스트림 정보 리스트)
+    """
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+    with _indexes_lock:
+        # 이미 만들어진 인덱스가 있으면 재사용
+        index = _indexes.get(signature[0])
+        if index is not None and (index.mtime, index.size) == signature[1:]:
+            return {"duration": index.duration, "streams": index.streams}
+        if signature in _probes:
+            return _probes[signature]
+
+    info = json.loads(
+        _run_ffprobe(["-show_format", "-show_streams", "-of", "json", path])
+    )
+    probe = {
+        "duration": float(info.get("format", {}).get("duration", 0.0)),
+        "streams": [
+            {key: stream[key] for key in _STREAM_FIELDS if key in stream}
+            for stream in info.get("streams", [])
+        ],
+    }
+    with _indexes_lock:
+        if len(_probes) >= MEDIA_PROBE_CACHE_SIZE:
+            # 가장 오래된 항목 제거
+            _probes.pop(next(iter(_probes)))
+        _probes[signature] = probe
+    return probe
+
+
+def build_media_index(path: str) -> MediaIndex:
+    """ffprobe로 미디어 인덱스 생성 (디코딩 없이 컨테이너/패킷 정보만 읽음)."""
+    stat = os.stat(path)
+    probe = probe_media(path)
+    streams = probe["streams"]
+
+    keyframes, keyframe_offsets, keyframe_packets = [], [], []
+    if any(stream.get("codec_type") == "video" for stream in streams):
+        packets = _run_ffprobe(
+            [
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "packet=pts_time,pos,flags",
+                "-of",
+                "csv=p=0",
+                path,
+            ]
+        )
+        for number, line in enumerate(packets.splitlines()):
+            pts_time, pos, flags = (line.split(",") + ["", "", ""])[:3]
+            if "K" in flags and pts_time not in ("", "N/A"):
+                keyframes.append(float(pts_time))
+                keyframe_offsets.append(int(pos) if pos.isdigit() else -1)
+                keyframe_packets.append(number)
+        order = sorted(range(len(keyframes)), key=keyframes.__getitem__)
+        keyframes = [keyframes[i] for i in order]
+        keyframe_offsets = [keyframe_offsets[i] for i in order]
+        keyframe_packets = [keyframe_packets[i] for i in order]
+
+    return MediaIndex(
+        path=os.path.abspath(path),
+        mtime=stat.st_mtime,
+        size=stat.st_size,
+        duration=probe["duration"],
+        streams=streams,
+        keyframes=keyframes,
+        keyframe_offsets=keyframe_offsets,
+        keyframe_packets=keyframe_packets,
+    )
+
+
+def _load_sidecar(path: str) -> Optional[MediaIndex]:
+    try:
+        with open(_index_path(path), "r", encoding="utf-8") as f:
+            index = MediaIndex(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+    if len(index.keyframe_packets) != len(index.keyframes):
+        # 패킷 번호가 없는 이전 형식의 인덱스는 다시 생성
+        return None
+    return index if index.is_valid_for(path) else None
+
+
+def _save_sidecar(path: str, index: MediaIndex) -> None:
+    temp_path = f"{_index_path(path)}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(index), f)
+        os.replace(temp_path, _index_path(path))
+    except OSError as e:
+        print(f"Error saving media index for {path}: {str(e)}")
+
+
+def get_media_index(path: str) -> MediaIndex:
+    """미디어 인덱스 반환 (메모리 → 파일 옆 인덱스 파일 → ffprobe 순서).
+
+    파일의 수정 시각이나 크기가 바뀌면 인덱스를 다시 생성한다.
+
+    Args:
+        path: 영상 파일 경로
+
+    Returns:
+        MediaIndex: 미디어 인덱스
+    """
+    key = os.path.abspath(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+    if index is not None and index.is_valid_for(path):
+        return index
+
+    index = _load_sidecar(path)
+    if index is None:
+        index = build_media_index(path)
+        _save_sidecar(path, index)
+
+    with _indexes_lock:
+        _indexes[key] = index
+    return index
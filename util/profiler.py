@@ -0,0 +1,222 @@
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from typing import Dict, Iterator, List, Optional
+
+
+@dataclass
+class Span:
+    """측정 구간.
+
+    Attributes:
+        name: 구간 이름
+        span_id: 구간 ID
+        parent_id: 상위 구간 ID (최상위면 None)
+        start: 프로파일링 시작 기준 시작 시각(초)
+        end: 프로파일링 시작 기준 종료 시각(초)
+        track: 실행 흐름 (asyncio 작업 이름 또는 스레드 이름)
+        attrs: 부가 정보 (세그먼트 번호, 명령 등)
+    """
+
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    start: float
+    end: Optional[float] = None
+    track: str = ""
+    attrs: dict = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or self.start) - self.start
+
+
+class Profiler:
+    """한 번의 실행(영상 하나 처리)에 대한 구간 기록."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._origin = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def start_span(self, name: str, parent: Optional[Span], attrs: dict) -> Span:
+        span = Span(
+            name=name,
+            span_id=next(self._ids),
+            parent_id=parent.span_id if parent else None,
+            start=self.now(),
+            track=_current_track(),
+            attrs=attrs,
+        )
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def summary(self) -> Dict[str, dict]:
+        """구간 이름별 횟수/총 시간/최대 시간."""
+        result: Dict[str, dict] = {}
+        for span in self.spans:
+            stats = result.setdefault(span.name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            stats["count"] += 1
+            stats["total_s"] += span.duration
+            stats["max_s"] = max(stats["max_s"], span.duration)
+        return result
+
+    def to_chrome_trace(self) -> dict:
+        """Chrome trace 형식 (chrome://tracing, Perfetto에서 열람).
+
+        동시에 실행되는 asyncio 작업이 서로 겹쳐 보이지 않도록 작업(track)마다
+        별도 스레드 줄(tid)에 표시한다.
+        """
+        pid = os.getpid()
+        tracks: Dict[str, int] = {}
+        events = []
+        for span in self.spans:
+            tid = tracks.setdefault(span.track, len(tracks) + 1)
+            events.append(
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": span.start * 1e6,
+                    "dur": span.duration * 1e6,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": span.attrs,
+                }
+            )
+        for track, tid in tracks.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": track},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str) -> None:
+        """확장자에 따라 JSON lines(.jsonl) 또는 Chrome trace(.json)로 저장."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                for span in self.spans:
+                    f.write(json.dumps(asdict(span), ensure_ascii=False, default=str) + "\n")
+            else:
+                json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)
+
+
+_profiler: ContextVar[Optional[Profiler]] = ContextVar("profiler", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def _current_track() -> str:
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return task.get_name()
+    return threading.current_thread().name
+
+
+def get_profiler() -> Optional[Profiler]:
+    """현재 컨텍스트에서 활성화된 프로파일러 (없으면 None)."""
+    return _profiler.get()
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Optional[Span]]:
+    """구간 측정 (프로파일링이 꺼져 있으면 아무것도 하지 않음).
+
+    contextvars로 상위 구간을 추적하므로 asyncio 작업/asyncio.to_thread로
+    넘어가도 중첩 관계가 유지된다.
+
+    Args:
+        name: 구간 이름
+        **attrs: 부가 정보
+
+    Yields:
+        Optional[Span]: 측정 중인 구간
+    """
+    profiler = _profiler.get()
+    if profiler is None:
+        yield None
+        return
+    current = profiler.start_span(name, _current_span.get(), attrs)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        current.end = profiler.now()
+        _current_span.reset(token)
+
+
+def profile(name: Optional[str] = None):
+    """함수 실행 시간을 구간으로 기록하는 데코레이터 (동기/비동기 모두 지원).
+
+    Args:
+        name: 구간 이름 (없으면 함수 이름)
+    """
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def profiling(output_path: Optional[str] = None) -> Iterator[Profiler]:
+    """현재 컨텍스트에서 프로파일링 활성화.
+
+    Args:
+        output_path: 종료 시 저장할 경로 (.jsonl 또는 Chrome trace .json, 없으면 저장 안 함)
+
+    Yields:
+        Profiler: 구간이 기록되는 프로파일러
+    """
+    profiler = Profiler()
+    token = _profiler.set(profiler)
+    try:
+        with span("run"):
+            yield profiler
+    finally:
+        _profiler.reset(token)
+        if output_path:
+            try:
+                profiler.write(output_path)
+                print(f"Profile written to {output_path}")
+            except OSError as e:
+                print(f"Error writing profile: {str(e)}")
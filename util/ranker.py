@@ -0,0 +1,171 @@
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .constants import *
+
+
+# 감탄/웃음/박수 등 반응 표시
+_REACTION_PATTERN = re.compile(
+    r"!|ㅋ+|ㅎㅎ+|하하+|헐|대박|\[(웃음|박수|환호|함성)\]|"
+    r"\[(laughter|applause|cheering)\]|\((laughter|applause)\)|\blol\b",
+    re.IGNORECASE,
+)
+# 물음표는 설명/진행 멘트에도 흔하므로 반응과 분리해 낮은 가중치로 반영
+_QUESTION_PATTERN = re.compile(r"\?")
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    std = values.std()
+    if std == 0:
+        return np.zeros_like(values)
+    return (values - values.mean()) / std
+
+
+def compute_segment_features(transcript: List[dict]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """60초 세그먼트별 특징값 계산.
+
+    Args:
+        transcript: 유튜브 영상 자막 (text/start/duration 딕셔너리 리스트)
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, np.ndarray]]: 세그먼트 번호 배열과 특징값
+            - speech_rate: 초당 단어 수
+            - reaction: 단어 대비 감탄/웃음 표시 비율
+            - question: 단어 대비 물음표 비율
+            - tfidf: 세그먼트 고유 키워드 밀도 (TF-IDF 평균)
+    """
+    starts = np.array([trans["start"] for trans in transcript], dtype=np.float64)
+    durations = np.array([trans["duration"] for trans in transcript], dtype=np.float64)
+    line_words = [_WORD_PATTERN.findall(trans["text"].lower()) for trans in transcript]
+    word_counts = np.array([len(words) for words in line_words], dtype=np.float64)
+    reaction_counts = np.array(
+        [len(_REACTION_PATTERN.findall(trans["text"])) for trans in transcript],
+        dtype=np.float64,
+    )
+    question_counts = np.array(
+        [len(_QUESTION_PATTERN.findall(trans["text"])) for trans in transcript],
+        dtype=np.float64,
+    )
+
+    line_groups = (starts // VIDEO_SEGMENT_LENGTH).astype(np.int64)
+    keys, group_index = np.unique(line_groups, return_inverse=True)
+    n_groups = len(keys)
+
+    words_per_group = np.bincount(group_index, weights=word_counts, minlength=n_groups)
+    seconds_per_group = np.bincount(group_index, weights=durations, minlength=n_groups)
+    reactions_per_group = np.bincount(
+        group_index, weights=reaction_counts, minlength=n_groups
+    )
+    questions_per_group = np.bincount(
+        group_index, weights=question_counts, minlength=n_groups
+    )
+    safe_words = np.maximum(words_per_group, 1)
+
+    # TF-IDF: (세그먼트, 단어) 쌍을 정수 코드로 만들어 희소하게 집계
+    vocabulary: Dict[str, int] = {}
+    term_ids, term_groups = [], []
+    for group, words in zip(group_index, line_words):
+        for word in words:
+            term_ids.append(vocabulary.setdefault(word, len(vocabulary)))
+            term_groups.append(group)
+    tfidf = np.zeros(n_groups)
+    if term_ids:
+        term_ids = np.array(term_ids, dtype=np.int64)
+        term_groups = np.array(term_groups, dtype=np.int64)
+        pair_codes, pair_counts = np.unique(
+            term_groups * len(vocabulary) + term_ids, return_counts=True
+        )
+        pair_groups = pair_codes // len(vocabulary)
+        pair_terms = pair_codes % len(vocabulary)
+        document_freq = np.bincount(pair_terms, minlength=len(vocabulary))
+        idf = np.log((1 + n_groups) / (1 + document_freq)) + 1
+        weights = pair_counts * idf[pair_terms]
+        tfidf = np.bincount(pair_groups, weights=weights, minlength=n_groups) / safe_words
+
+    features = {
+        "speech_rate": words_per_group / np.maximum(seconds_per_group, 1),
+        "reaction": reactions_per_group / safe_words,
+        "question": questions_per_group / safe_words,
+        "tfidf": tfidf,
+    }
+    return keys, features
+
+
+def rank_segments(transcript: List[dict]) -> List[Tuple[int, float]]:
+    """자막 기반 휴리스틱 점수로 세그먼트 순위 계산.
+
+    특징값을 각각 표준화(z-score)한 뒤 PRERANK_WEIGHTS로 가중합한다.
+
+    Args:
+        transcript: 유튜브 영상 자막
+
+    Returns:
+        List[Tuple[int, float]]: 점수 내림차순 (세그먼트 번호, 점수) 리스트
+    """
+    if not transcript:
+        return []
+    keys, features = compute_segment_features(transcript)
+    scores = np.zeros(len(keys))
+    for name, weight in PRERANK_WEIGHTS.items():
+        scores += weight * _zscore(features[name])
+    order = np.argsort(-scores, kind="stable")
+    return [(int(keys[i]), float(scores[i])) for i in order]
+
+
+def select_top_segments(transcript: List[dict], top_k: int) -> List[int]:
+    """점수 상위 top_k개 세그먼트 번호를 시간 순으로 반환."""
+    return sorted(key for key, _ in rank_segments(transcript)[:top_k])
+
+
+if __name__ == "__main__":
+    # 사전 순위 vs LLM 경로 비교 벤치마크
+    #   python -m util.ranker [transcript.json] [--llm]
+    # transcript.json: YouTubeTranscriptApi 형식의 자막 리스트
+    #   (생략 시 util/fixtures/transcript_sample.json: 3·7번 반응 구간, 5번 질문 구간)
+    import asyncio
+    import json
+    import os
+    import sys
+    import time
+
+    from main import get_target_clip_count, process_map_reduce
+    from util.chain import get_llm_cache
+    from util.youtube import VideoMetadata, YouTubeVideo
+
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    transcript_path = (
+        paths[0]
+        if paths
+        else os.path.join(os.path.dirname(__file__), "fixtures", "transcript_sample.json")
+    )
+    with open(transcript_path, "r", encoding="utf-8") as f:
+        transcript = json.load(f)
+    duration = int(transcript[-1]["start"] + transcript[-1]["duration"])
+    target_count = get_target_clip_count(duration)
+
+    start_time = time.perf_counter()
+    fast_results = select_top_segments(transcript, target_count)
+    print(f"Pre-rank: {fast_results} ({(time.perf_counter() - start_time) * 1000:.1f} ms)")
+
+    if "--llm" in sys.argv:
+        video = YouTubeVideo(
+            "https://www.youtube.com/watch?v=benchmark00",
+            VideoMetadata("benchmark00", "Entertainment", transcript, duration, "benchmark"),
+        )
+        start_time = time.perf_counter()
+        # 캐시된 응답을 읽지 않아야 실제 LLM 호출 시간과 비교됨
+        with get_llm_cache().refresh():
+            time_segments = asyncio.run(
+                process_map_reduce(
+                    video, video.category, video.shorts_group, video.shorts_all_text, mode="llm"
+                )
+            )
+        llm_results = sorted(
+            (start + CLIP_PADDING) // VIDEO_SEGMENT_LENGTH for start, _ in time_segments
+        )
+        overlap = len(set(fast_results) & set(llm_results))
+        print(f"LLM: {llm_results} ({time.perf_counter() - start_time:.2f} s)")
+        print(f"Overlap: {overlap}/{target_count}")
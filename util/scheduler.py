@@ -0,0 +1,217 @@
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .constants import *
+from .profiler import span
+
+
+# 작업 우선순위 (값이 작을수록 먼저 실행)
+PRIORITY_INTERACTIVE = 0  # 미리보기/변환 등 사용자가 기다리는 작업
+PRIORITY_BATCH = 10  # 하이라이트 클립 일괄 생성
+
+
+class JobCancelledError(RuntimeError):
+    """스케줄러에서 취소된 작업."""
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    group: Optional[str] = field(compare=False, default=None)
+    loop: Optional[asyncio.AbstractEventLoop] = field(compare=False, default=None)
+    future: Optional[asyncio.Future] = field(compare=False, default=None)
+    process: Optional[asyncio.subprocess.Process] = field(compare=False, default=None)
+    state: str = field(compare=False, default="queued")  # queued/running/done/cancelled
+
+
+class FFmpegScheduler:
+    """프로세스 공용 ffmpeg 작업 스케줄러.
+
+    동시에 실행되는 ffmpeg 프로세스 수를 max_workers로 제한하고, 대기 중인
+    작업은 우선순위 순으로 실행한다. Streamlit 세션마다 별도 이벤트 루프에서
+    호출되므로 asyncio.Semaphore 대신 스레드 안전한 대기열을 사용한다.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Args:
+            max_workers: 최대 동시 실행 수 (None이면 CPU 코어 수)
+        """
+        self.max_workers = max_workers or FFMPEG_MAX_WORKERS or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._waiting: List[_Job] = []
+        self._running: List[_Job] = []
+        self._seq = itertools.count()
+        self._completed = 0
+        self._cancelled = 0
+        self._max_queue_depth = 0
+
+    async def run(
+        self,
+        cmd: List[str],
+        priority: int = PRIORITY_BATCH,
+        group: Optional[str] = None,
+    ) -> Tuple[int, bytes, bytes]:
+        """실행 슬롯을 확보한 뒤 ffmpeg 명령 실행.
+
+        Args:
+            cmd: 실행할 명령
+            priority: 작업 우선순위
+            group: 작업 그룹 (세션 ID 등, cancel_group으로 일괄 취소)
+
+        Returns:
+            Tuple[int, bytes, bytes]: 반환 코드, stdout, stderr
+        """
+        with span("ffmpeg", priority=priority, group=group, output=cmd[-1]):
+            with span("ffmpeg.queue"):
+                job = await self._acquire(priority, group)
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                )
+                with self._lock:
+                    job.process = process
+                    cancelled = job.state == "cancelled"
+                if cancelled:
+                    process.kill()
+
+                try:
+                    stdout, stderr = await process.communicate()
+                except asyncio.CancelledError:
+                    # 기다리던 작업이 취소되어도 ffmpeg 프로세스는 계속 실행되므로 종료
+                    with self._lock:
+                        job.state = "cancelled"
+                    if process.returncode is None:
+                        process.kill()
+                    await process.wait()
+                    raise
+                if job.state == "cancelled":
+                    raise JobCancelledError(f"FFmpeg job cancelled (group={group})")
+                return process.returncode, stdout, stderr
+            finally:
+                self._release(job)
+
+    async def _acquire(self, priority: int, group: Optional[str]) -> _Job:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            job = _Job(priority, next(self._seq), group, loop, loop.create_future())
+            if len(self._running) < self.max_workers and not self._waiting:
+                job.state = "running"
+                self._running.append(job)
+                return job
+            heapq.heappush(self._waiting, job)
+            self._max_queue_depth = max(self._max_queue_depth, len(self._waiting))
+
+        try:
+            await job.future
+        except asyncio.CancelledError:
+            with self._lock:
+                # cancel_group으로 취소된 경우 이미 cancelled 상태
+                cancelled_by_group = job.state == "cancelled"
+                granted = job.state == "running"
+                if job in self._waiting:
+                    self._waiting.remove(job)
+                    heapq.heapify(self._waiting)
+                if job.state == "queued":
+                    job.state = "cancelled"
+                    self._cancelled += 1
+            if granted:
+                self._release(job)
+            if cancelled_by_group:
+                raise JobCancelledError(f"FFmpeg job cancelled (group={group})")
+            raise
+        return job
+
+    def _release(self, job: _Job) -> None:
+        with self._lock:
+            if job not in self._running:
+                return
+            self._running.remove(job)
+            if job.state == "cancelled":
+                self._cancelled += 1
+            else:
+                job.state = "done"
+                self._completed += 1
+
+            # 빈 슬롯을 우선순위가 가장 높은 대기 작업에 할당
+            while self._waiting and len(self._running) < self.max_workers:
+                waiter = heapq.heappop(self._waiting)
+                try:
+                    waiter.loop.call_soon_threadsafe(_set_future_result, waiter.future)
+                except RuntimeError:
+                    # 대기 중이던 이벤트 루프가 이미 종료됨
+                    waiter.state = "cancelled"
+                    self._cancelled += 1
+                    continue
+                waiter.state = "running"
+                self._running.append(waiter)
+
+    def cancel_group(self, group: str) -> int:
+        """그룹에 속한 대기/실행 중 작업 취소.
+
+        Args:
+            group: 취소할 작업 그룹
+
+        Returns:
+            int: 취소된 작업 수
+        """
+        count = 0
+        with self._lock:
+            for job in [job for job in self._waiting if job.group == group]:
+                self._waiting.remove(job)
+                job.state = "cancelled"
+                self._cancelled += 1
+                _call_threadsafe(job.loop, job.future.cancel)
+                count += 1
+            heapq.heapify(self._waiting)
+
+            for job in self._running:
+                if job.group == group and job.state == "running":
+                    job.state = "cancelled"
+                    if job.process is not None and job.process.returncode is None:
+                        _call_threadsafe(job.loop, job.process.kill)
+                    count += 1
+        return count
+
+    def metrics(self) -> Dict[str, int]:
+        """대기열 깊이 등 스케줄러 상태 반환."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": len(self._running),
+                "queued": len(self._waiting),
+                "max_queue_depth": self._max_queue_depth,
+                "completed": self._completed,
+                "cancelled": self._cancelled,
+            }
+
+
+def _set_future_result(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _call_threadsafe(loop: asyncio.AbstractEventLoop, callback) -> None:
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:
+        pass
+
+
+_scheduler: Optional[FFmpegScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> FFmpegScheduler:
+    """프로세스 공용 ffmpeg 스케줄러 반환."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FFmpegScheduler()
+        return _scheduler
@@ -2,9 +2,9 @@ from dataclasses import dataclass
 from typing import List, Tuple
 import os
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from moviepy.editor import VideoFileClip
 from .constants import *
+from .scheduler import get_scheduler
+from .video_utils import build_encode_cmd, get_video_duration
 
 @dataclass
 class VideoSegment:
@@ -59,48 +59,38 @@ class VideoProcessor:
         temp_path = f"{output_path}.temp.mp4"
 
         try:
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as pool:
-                await loop.run_in_executor(
-                    pool,
-                    self._process_clip,
-                    segment,
-                    temp_path,
-                    output_path
-                )
+            await self._process_clip(segment, temp_path, output_path)
         except Exception as e:
             print(f"Error processing segment {segment.index}: {str(e)}")
             if os.path.exists(temp_path):
                 os.remove(temp_path)
 
-    def _process_clip(self, segment: VideoSegment, temp_path: str, final_path: str) -> None:
-        """클립 생성 처리.
+    async def _process_clip(self, segment: VideoSegment, temp_path: str, final_path: str) -> None:
+        """클립 생성 처리 (ffmpeg 재인코딩).
         
         Args:
             segment: 세그먼트 정보
             temp_path: 임시 파일 경로
             final_path: 최종 파일 경로
         """
-        with VideoFileClip(self.input_path) as video:
-            duration = video.duration
-            start_t = min(segment.start_time, duration - MIN_CLIP_LENGTH)
-            end_t = min(segment.end_time, duration)
+        # ffprobe 실행/인덱스 파일 읽기가 이벤트 루프를 막지 않도록 스레드에서 조회
+        duration = await asyncio.to_thread(get_video_duration, self.input_path)
+        start_t = max(0, min(segment.start_time, duration - MIN_CLIP_LENGTH))
+        end_t = min(segment.end_time, duration)
 
-            if start_t >= end_t:
-                raise ValueError("Invalid time segment")
+        if start_t >= end_t:
+            raise ValueError("Invalid time segment")
 
-            clip = video.subclip(start_t, end_t)
-            clip.write_videofile(
-                temp_path,
-                codec='libx264',
-                audio_codec='aac',
-                temp_audiofile=None,
-                remove_temp=True,
-                threads=4
+        returncode, _, stderr = await get_scheduler().run(
+            build_encode_cmd(self.input_path, temp_path, start_t, end_t)
+        )
+        if returncode != 0:
+            raise RuntimeError(
+                f"FFmpeg failed with return code {returncode}: "
+                f"{stderr.decode(errors='ignore')[-500:]}"
             )
-            clip.close()
 
         if os.path.exists(temp_path):
             if os.path.exists(final_path):
                 os.remove(final_path)
-            os.rename(temp_path, final_path) 
\ No newline at end of file
+            os.rename(temp_path, final_path)
@@ -1,6 +1,6 @@
-import subprocess
-import json
-from moviepy.editor import VideoFileClip
+from typing import List
+
+from .media_index import probe_media
 
 
 def get_video_duration(video_path: str) -> float:
@@ -14,11 +14,45 @@ def get_video_duration(video_path: str) -> float:
         float: 비디오 재생 시간 (초)
     """
     try:
-        # moviepy를 사용하여 비디오 정보 추출
-        clip = VideoFileClip(video_path)
-        duration = clip.duration
-        clip.close()
-        return duration
+        # ffprobe로 컨테이너 정보만 읽음 (디코딩 없음, 파일별 캐시)
+        return probe_media(video_path)["duration"]
 
     except Exception as e:
         raise Exception(f"비디오 재생 시간을 가져오는데 실패했습니다: {str(e)}")
+
+
+def build_encode_cmd(
+    input_path: str, output_path: str, start_t: float, end_t: float, threads: int = 4
+) -> List[str]:
+    """
+    구간을 libx264/aac로 재인코딩하는 ffmpeg 명령 생성.
+
+    Args:
+        input_path (str): 입력 영상 경로
+        output_path (str): 출력 영상 경로
+        start_t (float): 시작 시간(초)
+        end_t (float): 종료 시간(초)
+        threads (int): 인코딩 스레드 수
+
+    Returns:
+        List[str]: ffmpeg 명령
+    """
+    return [
+        "ffmpeg",
+        "-y",
+        "-ss",
+        str(start_t),
+        "-i",
+        input_path,
+        "-t",
+        str(end_t - start_t),
+        "-c:v",
+        "libx264",
+        "-c:a",
+        "aac",
+        "-threads",
+        str(threads),
+        "-f",
+        "mp4",
+        output_path,
+    ]
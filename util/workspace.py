@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .constants import *
+
+
+@dataclass(frozen=True)
+class Workspace:
+    """작업(영상 처리 1회)별 독립 디렉토리.
+
+    Attributes:
+        workspace_id: 작업 공간 ID (디렉토리 이름)
+        root: 작업 공간 루트 경로
+    """
+
+    workspace_id: str
+    root: str
+
+    @property
+    def input_dir(self) -> str:
+        return os.path.join(self.root, "input")
+
+    @property
+    def output_dir(self) -> str:
+        return os.path.join(self.root, "output")
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                pass  # 동시에 삭제된 파일
+    return total
+
+
+class WorkspaceManager:
+    """작업 공간 생성/참조 카운트/용량 관리.
+
+    사용 중인(참조 카운트 > 0) 작업 공간은 삭제하지 않는다. 참조가 모두
+    해제된 작업 공간은 재사용할 수 있도록 남겨 두었다가, 전체 용량이
+    quota_bytes를 넘으면 마지막 사용 시각이 오래된 것부터 삭제한다.
+    Streamlit은 세션 종료를 알려주지 않으므로 lease_ttl 동안 사용되지
+    않은 작업 공간은 참조가 남아 있어도 정리 대상으로 본다.
+    """
+
+    def __init__(
+        self,
+        base_dir: str = WORKSPACE_DIR,
+        quota_bytes: int = WORKSPACE_QUOTA_BYTES,
+        lease_ttl: float = WORKSPACE_LEASE_TTL,
+    ):
+        """
+        Args:
+            base_dir: 작업 공간 상위 디렉토리
+            quota_bytes: 전체 작업 공간 최대 용량(바이트)
+            lease_ttl: 참조가 남아 있어도 정리 대상이 되는 미사용 시간(초)
+        """
+        self.base_dir = base_dir
+        self.quota_bytes = quota_bytes
+        self.lease_ttl = lease_ttl
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        os.makedirs(base_dir, exist_ok=True)
+
+    def create(self, prefix: str = "job") -> Workspace:
+        """새 작업 공간 생성 (참조 카운트 1).
+
+        Args:
+            prefix: 디렉토리 이름 접두어 (세션 ID 등)
+
+        Returns:
+            Workspace: 생성된 작업 공간
+        """
+        self.enforce_quota()
+        root = tempfile.mkdtemp(prefix=f"{prefix}-", dir=self.base_dir)
+        workspace = Workspace(os.path.basename(root), root)
+        os.makedirs(workspace.input_dir)
+        os.makedirs(workspace.output_dir)
+        with self._lock:
+            self._refs[workspace.workspace_id] = 1
+        return workspace
+
+    def acquire(self, workspace_id: str) -> Optional[Workspace]:
+        """기존 작업 공간 참조 (이미 삭제되었으면 None)."""
+        root = os.path.join(self.base_dir, workspace_id)
+        with self._lock:
+            if not os.path.isdir(root):
+                return None
+            self._refs[workspace_id] = self._refs.get(workspace_id, 0) + 1
+        workspace = Workspace(workspace_id, root)
+        self.touch(workspace)
+        return workspace
+
+    def release(self, workspace: Workspace, delete: bool = False) -> None:
+        """참조 해제.
+
+        Args:
+            workspace: 작업 공간
+            delete: 마지막 참조였다면 즉시 삭제 (False면 용량 초과 시 LRU로 정리)
+        """
+        with self._lock:
+            refs = self._refs.get(workspace.workspace_id, 1) - 1
+            if refs > 0:
+                self._refs[workspace.workspace_id] = refs
+                return
+            self._refs.pop(workspace.workspace_id, None)
+            if delete:
+                shutil.rmtree(workspace.root, ignore_errors=True)
+                return
+        self.touch(workspace)
+
+    def touch(self, workspace: Workspace) -> None:
+        """마지막 사용 시각 갱신 (LRU 기준)."""
+        try:
+            os.utime(workspace.root)
+        except OSError:
+            pass
+
+    def usage(self) -> int:
+        """전체 작업 공간 용량(바이트)."""
+        return _dir_size(self.base_dir)
+
+    def enforce_quota(self) -> List[str]:
+        """용량을 넘으면 사용하지 않는 작업 공간을 오래된 순서로 삭제.
+
+        Returns:
+            List[str]: 삭제된 작업 공간 ID 리스트
+        """
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.base_dir):
+            root = os.path.join(self.base_dir, name)
+            if os.path.isdir(root):
+                entries.append((os.path.getmtime(root), name, _dir_size(root)))
+        total = sum(size for _, _, size in entries)
+
+        evicted = []
+        for mtime, name, size in sorted(entries):
+            if total <= self.quota_bytes:
+                break
+            with self._lock:
+                in_use = self._refs.get(name, 0) > 0 and now - mtime < self.lease_ttl
+                if in_use:
+                    continue
+                self._refs.pop(name, None)
+                shutil.rmtree(os.path.join(self.base_dir, name), ignore_errors=True)
+            total -= size
+            evicted.append(name)
+        if evicted:
+            print(f"Evicted workspaces: {evicted}")
+        return evicted
+
+
+_manager: Optional[WorkspaceManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_workspace_manager() -> WorkspaceManager:
+    """프로세스 공용 작업 공간 관리자 반환."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = WorkspaceManager()
+        return _manager
@@ -1,82 +1,249 @@
 from youtube_transcript_api import YouTubeTranscriptApi
 from kiwipiepy import Kiwi
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium import webdriver
+import inspect
 import time
 from functools import wraps
 
 from pytubefix import YouTube
 from pytubefix.cli import on_progress
 import os
-from moviepy.editor import VideoFileClip
 
 import aiofiles
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
 import re
 import unicodedata
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from .cache import get_metadata_cache
+from .category import CategoryResolver
+from .constants import *
+from .downloader import (
+    ProgressiveDownload,
+    RangePieces,
+    StreamPolicy,
+    download_time_ranges,
+    get_range_sources,
+    select_streams,
+    stream_range_source,
+)
+from .profiler import profile
+from .scheduler import get_scheduler
+from .video_utils import build_encode_cmd, get_video_duration
 
 
 def time_measure_decorator(func):
+    """실행 시간 출력 + 프로파일 구간 기록 (동기/비동기 함수 모두 지원)."""
+    profiled = profile(func.__name__)(func)
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return await profiled(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start_time
+                print(f"Execution time of {func.__name__}: {elapsed:.4f} seconds")
+
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        print(f"Execution time of {func.__name__}: {end_time - start_time:.4f} seconds")
-        return result
+        start_time = time.perf_counter()
+        try:
+            return profiled(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            print(f"Execution time of {func.__name__}: {elapsed:.4f} seconds")
 
     return wrapper
 
 
-@time_measure_decorator
+def extract_video_id(video_url: str) -> str:
+    """유튜브 URL에서 영상 ID 추출."""
+    return video_url.split("v=")[1][:11]
+
+
+@dataclass
+class VideoMetadata:
+    """영상 메타데이터 묶음.
+
+    Attributes:
+        video_id: 유튜브 영상 ID
+        category: 영상 카테고리
+        transcript: 자막 리스트
+        duration: 영상 길이(초)
+        title: 영상 제목
+        yt: 메타데이터 조회에 사용한 YouTube 객체 (다운로드 시 재사용)
+    """
+
+    video_id: str
+    category: str
+    transcript: List[dict]
+    duration: int
+    title: str
+    yt: Optional[YouTube] = None
+
+
+@profile("metadata.transcript")
+def _fetch_transcript(video_id: str) -> List[dict]:
+    return YouTubeTranscriptApi.get_transcript(video_id, languages=SUPPORTED_LANGUAGES)
+
+
+@profile("metadata.streams")
+def _prefetch_youtube(yt: YouTube) -> tuple:
+    """YouTube 객체의 길이/제목/스트림 정보를 미리 조회.
+
+    Returns:
+        tuple: (길이, 제목, 플레이어 응답) - 플레이어 응답은 카테고리 조회에 재사용
+    """
+    # 스트림 목록까지 미리 받아 두어 다운로드 시 추가 요청이 없도록 함
+    yt.streams
+    return yt.length, yt.title, yt.vid_info
+
+
+def _load_cached_metadata(video_url: str) -> Optional[VideoMetadata]:
+    """캐시된 메타데이터 반환 (없으면 None)."""
+    video_id = extract_video_id(video_url)
+    cached = get_metadata_cache().get(video_id)
+    if cached is None:
+        return None
+    # 네트워크 조회 없이 생성 (스트림 정보는 다운로드 시점에 조회)
+    yt = YouTube(video_url, on_progress_callback=on_progress)
+    return VideoMetadata(video_id=video_id, yt=yt, **cached)
+
+
+def _store_metadata(metadata: VideoMetadata) -> None:
+    get_metadata_cache().set(
+        metadata.video_id,
+        {
+            "category": metadata.category,
+            "transcript": metadata.transcript,
+            "duration": metadata.duration,
+            "title": metadata.title,
+        },
+    )
+
+
+@profile("metadata")
+async def load_video_metadata(video_url: str) -> VideoMetadata:
+    """자막, 영상 정보, 카테고리를 동시에 조회.
+
+    캐시에 저장된 메타데이터가 있으면 네트워크 조회 없이 반환한다.
+
+    Args:
+        video_url: 유튜브 영상 URL
+
+    Returns:
+        VideoMetadata: 영상 메타데이터
+    """
+    cached = _load_cached_metadata(video_url)
+    if cached is not None:
+        return cached
+
+    video_id = extract_video_id(video_url)
+    yt = YouTube(video_url, on_progress_callback=on_progress)
+
+    prefetch = asyncio.ensure_future(asyncio.to_thread(_prefetch_youtube, yt))
+
+    async def vid_info() -> Optional[dict]:
+        return (await prefetch)[2]
+
+    # 카테고리 HTTP 조회도 함께 시작하고, 플레이어 응답에 카테고리가 있으면
+    # 그 결과를 기다리지 않음 (가장 느린 조회 하나만큼만 대기)
+    transcript, (duration, title, _), category = await asyncio.gather(
+        asyncio.to_thread(_fetch_transcript, video_id),
+        prefetch,
+        CategoryResolver().resolve_async(video_id, vid_info()),
+    )
+    metadata = VideoMetadata(
+        video_id=video_id,
+        category=category,
+        transcript=transcript,
+        duration=duration,
+        title=title,
+        yt=yt,
+    )
+    _store_metadata(metadata)
+    return metadata
+
+
 class YouTubeVideo:
-    def __init__(self, video_url):
+    def __init__(self, video_url, metadata: Optional[VideoMetadata] = None):
         self.video_url = video_url
-        self.video_id = self.get_video_id(video_url)
-        self.category = self.get_category()
-        self.transcript = self.get_transcript()
-        self.duration = self.get_duration()
+        if metadata is None:
+            metadata = _load_cached_metadata(video_url)
+        if metadata is None:
+            self.video_id = self.get_video_id(video_url)
+            # 캐시에는 제목까지 채운 메타데이터만 저장 (load_video_metadata와 동일)
+            self.yt = YouTube(video_url, on_progress_callback=on_progress)
+            self.duration, self.title, vid_info = _prefetch_youtube(self.yt)
+            self.category = CategoryResolver().resolve(self.video_id, vid_info)
+            self.transcript = self.get_transcript()
+            _store_metadata(
+                VideoMetadata(
+                    self.video_id,
+                    self.category,
+                    self.transcript,
+                    self.duration,
+                    self.title,
+                )
+            )
+        else:
+            self.video_id = metadata.video_id
+            self.category = metadata.category
+            self.transcript = metadata.transcript
+            self.duration = metadata.duration
+            self.title = metadata.title
+            self.yt = metadata.yt
+        self._build_transcript_index()
         self.shorts_group, self.shorts_all_text = self.get_shorts_group()
 
+    @classmethod
+    async def load(cls, video_url: str) -> "YouTubeVideo":
+        """메타데이터를 동시에 조회하여 YouTubeVideo 생성."""
+        metadata = await load_video_metadata(video_url)
+        return cls(video_url, metadata)
+
     def get_video_id(self, video_url):
-        video_id = video_url.split("v=")[1][:11]
-        return video_id
+        return extract_video_id(video_url)
 
     def get_transcript(self):
-        transcript = YouTubeTranscriptApi.get_transcript(
-            self.video_id, languages=["ko", "en"]
-        )
-        return transcript
+        return _fetch_transcript(self.video_id)
 
     def get_category(self):
         """
         유튜브 영상 카테고리 반환
         Args:
-            video_url: 유튜브 영상 URL
-            user_agent: User-Agent
+            video_id: 유튜브 영상 ID
         Returns:
             category: 유튜브 영상 카테고리
         """
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
+        return CategoryResolver().resolve(self.video_id)
 
-        # ChromeDriver를 자동으로 설치하고 관리
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+    def _build_transcript_index(self) -> None:
+        """자막 시작 시간 기준 정렬 인덱스 생성 (구간 조회용)."""
+        entries = sorted(self.transcript, key=lambda trans: trans["start"])
+        self._transcript_starts = [trans["start"] for trans in entries]
+        self._transcript_texts = [trans["text"] for trans in entries]
 
-        try:
-            driver.get(self.video_url)
-            html = driver.page_source
-            category = html.split('"category":"')[1].split('",')[0]
-        finally:
-            driver.quit()
+    def text_between(self, start: float, end: float) -> str:
+        """시작 시간이 [start, end] 구간에 포함되는 자막 텍스트 반환.
+
+        Args:
+            start: 구간 시작 시간(초)
+            end: 구간 종료 시간(초)
 
-        return category
+        Returns:
+            str: 공백으로 연결된 자막 텍스트
+        """
+        lo = bisect_left(self._transcript_starts, start)
+        hi = bisect_right(self._transcript_starts, end)
+        return " ".join(self._transcript_texts[lo:hi])
 
     def get_shorts_group(self):
         """
@@ -154,38 +321,124 @@ def normalize_filename(title: str) -> str:
     return title
 
 
-async def download_video(url: str) -> str:
-    """유튜브 영상 다운로드.
+def print_progress(received: int, total: int) -> None:
+    """다운로드 진행률 출력."""
+    print(f"\rDownloading: {received / total * 100:5.1f}%", end="" if received < total else "\n")
+
+
+@profile("download.start")
+async def start_video_download(
+    url: str,
+    yt: Optional[YouTube] = None,
+    policy: Optional[StreamPolicy] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = print_progress,
+    input_dir: str = INPUT_DIR,
+) -> Tuple[str, ProgressiveDownload]:
+    """유튜브 영상 다운로드를 백그라운드로 시작.
+
+    정책에 따라 적응형 비디오/오디오 스트림을 병렬 청크로 받아 ffmpeg로
+    합치거나(스트림 복사), 프로그레시브 스트림 하나를 받는다. 적응형
+    스트림이면 다운로드 중에도 받은 구간부터 클립을 자를 수 있다.
 
     Args:
         url: 유튜브 영상 URL
+        yt: 메타데이터 조회 시 생성한 YouTube 객체 (없으면 새로 생성)
+        policy: 스트림 선택 정책 (없으면 기본값)
+        progress_callback: (받은 바이트 수, 전체 바이트 수)를 받는 콜백
+        input_dir: 저장 디렉토리
 
     Returns:
-        str: 다운로드된 영상의 제목
+        Tuple[str, ProgressiveDownload]: 정규화된 영상 제목과 진행 중인 다운로드
     """
-    yt = YouTube(url, on_progress_callback=on_progress)
+    if yt is None:
+        yt = YouTube(url, on_progress_callback=on_progress)
     print(yt.title)
 
     # 파일명 정규화
     normalized_title = normalize_filename(yt.title)
-    ys = yt.streams.get_highest_resolution()
-
-    if not os.path.exists("input"):
-        os.makedirs("input")
-
-    loop = asyncio.get_event_loop()
-    with ThreadPoolExecutor() as pool:
-        # 정규화된 파일명으로 저장
-        await loop.run_in_executor(
-            pool,
-            lambda: ys.download(
-                output_path="input", filename=f"{normalized_title}.mp4"
-            ),
-        )
+    output_path = os.path.join(input_dir, f"{normalized_title}.mp4")
+    os.makedirs(input_dir, exist_ok=True)
+
+    video_stream, audio_stream = await asyncio.to_thread(select_streams, yt, policy)
+    if audio_stream is None:
+        streams = [(video_stream.url, output_path, None)]
+    else:
+        streams = []
+        for stream, path, extension in [
+            (video_stream, f"{output_path}.video.mp4", "mp4"),
+            (audio_stream, f"{output_path}.audio.m4a", "m4a"),
+        ]:
+            try:
+                source = await asyncio.to_thread(stream_range_source, yt, stream, extension)
+            except (ValueError, OSError) as e:
+                print(f"No segment index for itag {stream.itag}: {str(e)}")
+                source = None
+            streams.append((stream.url, path, source))
+
+    download = ProgressiveDownload(streams, output_path, progress_callback)
+    await download.start()
+    return normalized_title, download
+
+
+async def download_video(
+    url: str,
+    yt: Optional[YouTube] = None,
+    policy: Optional[StreamPolicy] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = print_progress,
+    input_dir: str = INPUT_DIR,
+) -> str:
+    """유튜브 영상 다운로드.
 
+    Args:
+        url: 유튜브 영상 URL
+        yt: 메타데이터 조회 시 생성한 YouTube 객체 (없으면 새로 생성)
+        policy: 스트림 선택 정책 (없으면 기본값)
+        progress_callback: (받은 바이트 수, 전체 바이트 수)를 받는 콜백
+        input_dir: 저장 디렉토리
+
+    Returns:
+        str: 다운로드된 영상의 제목
+    """
+    normalized_title, download = await start_video_download(
+        url, yt, policy, progress_callback, input_dir
+    )
+    await download.finish()
     return normalized_title
 
 
+async def download_video_ranges(
+    url: str,
+    time_segments: List[Tuple[int, int]],
+    yt: Optional[YouTube] = None,
+    policy: Optional[StreamPolicy] = None,
+    input_dir: str = INPUT_DIR,
+) -> Tuple[str, List[RangePieces]]:
+    """선택된 구간(+패딩)을 덮는 부분만 다운로드.
+
+    Args:
+        url: 유튜브 영상 URL
+        time_segments: 시작/종료 시간 튜플 리스트
+        yt: 메타데이터 조회 시 생성한 YouTube 객체 (없으면 새로 생성)
+        policy: 스트림 선택 정책 (없으면 기본값)
+        input_dir: 부분 파일 저장 상위 디렉토리
+
+    Returns:
+        Tuple[str, List[RangePieces]]: 정규화된 영상 제목과 세그먼트별 부분 파일
+    """
+    if yt is None:
+        yt = YouTube(url, on_progress_callback=on_progress)
+    normalized_title = normalize_filename(yt.title)
+
+    video_source, audio_source = await asyncio.to_thread(get_range_sources, yt, policy)
+    pieces = await download_time_ranges(
+        video_source,
+        audio_source,
+        time_segments,
+        os.path.join(input_dir, normalized_title),
+    )
+    return normalized_title, pieces
+
+
 async def make_clip_video(path, save_path, start_t, end_t):
     try:
         # 입력 파일 경로
@@ -198,52 +451,39 @@ async def make_clip_video(path, save_path, start_t, end_t):
         # 최종 저장 경로
         final_save_path = os.path.join(output_dir, save_path)
 
-        # 클립 영상 생성 비동기 처리
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as pool:
-            await loop.run_in_executor(
-                pool,
-                lambda: process_video_clip(input_file, final_save_path, start_t, end_t),
-            )
+        # 클립 영상 생성 (공용 ffmpeg 스케줄러에서 실행)
+        await process_video_clip(input_file, final_save_path, start_t, end_t)
     except Exception as e:
         print(f"Error processing video clip: {str(e)}")
 
 
-def process_video_clip(path, final_save_path, start_t, end_t):
+async def process_video_clip(path, final_save_path, start_t, end_t):
     try:
-        video = VideoFileClip(path)
-        duration = video.duration
+        duration = await asyncio.to_thread(get_video_duration, path)
 
-        try:
-            if start_t > duration or end_t > duration:
-                print(
-                    f"Start time or end time is greater than the video duration. Adjusting end time."
-                )
-                end_t = min(end_t, duration)
-                start_t = min(start_t, duration - 10)  # 최소 10초 전까지 클립 생성
-
-            clip = video.subclip(start_t, end_t)
-
-            # 임시 파일명으로 먼저 저장
-            temp_path = final_save_path + ".temp.mp4"
-            clip.write_videofile(
-                temp_path,
-                codec="libx264",
-                audio_codec="aac",
-                temp_audiofile=None,
-                remove_temp=True,
-                threads=4,
+        if start_t > duration or end_t > duration:
+            print(
+                f"Start time or end time is greater than the video duration. Adjusting end time."
             )
+            end_t = min(end_t, duration)
+            start_t = min(start_t, duration - 10)  # 최소 10초 전까지 클립 생성
 
-            # 성공적으로 생성되면 최종 파일명으로 변경
-            if os.path.exists(temp_path):
-                if os.path.exists(final_save_path):
-                    os.remove(final_save_path)
-                os.rename(temp_path, final_save_path)
+        # 임시 파일명으로 먼저 저장
+        temp_path = final_save_path + ".temp.mp4"
+        returncode, _, stderr = await get_scheduler().run(
+            build_encode_cmd(path, temp_path, start_t, end_t)
+        )
+        if returncode != 0:
+            raise RuntimeError(
+                f"FFmpeg failed with return code {returncode}: "
+                f"{stderr.decode(errors='ignore')[-500:]}"
+            )
 
-        finally:
-            clip.close()
-            video.close()
+        # 성공적으로 생성되면 최종 파일명으로 변경
+        if os.path.exists(temp_path):
+            if os.path.exists(final_save_path):
+                os.remove(final_save_path)
+            os.rename(temp_path, final_save_path)
 
     except Exception as e:
         print(f"Error in process_video_clip: {str(e)}")